@@ -21,6 +21,8 @@ from typing import Dict, List, Optional
 
 import polars as pl
 
+from flow_writer import with_event_dt
+
 sqlite3 = None  # SQLite no longer required for analysis; parent pairs read from flow log
 
 __all__ = [
@@ -30,6 +32,7 @@ __all__ = [
     "CartContribution",
     "ShipmentTimeline",
     "BarnStateChange",
+    "extract_parent_map",
 ]
 
 
@@ -181,9 +184,18 @@ class BarnFlowBuilder:
             raise ValueError(f"Barn {barn_id} did not receive any shipments in the selected range")
 
         shipments: List[ShipmentFlow] = []
-        parent_map = _extract_parent_map(flow)
+        parent_map = extract_parent_map(flow)
+        # Fetch rows for all shipments of interest in one pass, then group.
+        rows_by_shipment = {
+            key[0]: frame
+            for key, frame in flow.filter(pl.col("shipment_id").is_in(shipments_of_interest))
+            .partition_by("shipment_id", as_dict=True)
+            .items()
+        }
         for shipment_id in shipments_of_interest:
-            shipment_rows = flow.filter(pl.col("shipment_id") == shipment_id)
+            shipment_rows = rows_by_shipment.get(shipment_id)
+            if shipment_rows is None:
+                continue
             carts = _extract_cart_flows(shipment_rows)
             if not carts:
                 continue
@@ -240,9 +252,7 @@ def _load_flow(path: Path) -> pl.DataFrame:
     if not path.exists():
         raise FileNotFoundError(f"flow log not found: {path}")
     frame = pl.read_parquet(path)
-    return frame.with_columns(
-        pl.col("event_ts").str.strptime(pl.Datetime, strict=False).alias("event_dt")
-    )
+    return with_event_dt(frame)
 
 
 def _decode_json(value: Optional[str]) -> Dict[str, object]:
@@ -327,19 +337,18 @@ def _extract_cart_flows(shipment_rows: pl.DataFrame) -> Dict[str, _CartFlow]:
     return carts
 
 
-def _extract_parent_map(flow: pl.DataFrame) -> Dict[str, str]:
+def extract_parent_map(flow: pl.DataFrame) -> Dict[str, str]:
     """Build `shipment_id -> parent_pair` map from flow metadata (Parquet only)."""
-    pairs: Dict[str, str] = {}
-    subset = flow.filter(pl.col("resource_type") == "inventory").select([
-        pl.col("shipment_id"),
-        pl.col("metadata"),
-    ])
-    for row in subset.iter_rows(named=True):
-        meta = _decode_json(row["metadata"]) if row["metadata"] else {}
-        pp = meta.get("parent_pair")
-        if pp:
-            pairs[str(row["shipment_id"])] = str(pp)
-    return pairs
+    # Extract the key column-wise instead of json-decoding metadata per row.
+    subset = (
+        flow.filter(pl.col("resource_type") == "inventory")
+        .select(
+            pl.col("shipment_id").cast(pl.Utf8),
+            pl.col("metadata").str.json_path_match("$.parent_pair").alias("parent_pair"),
+        )
+        .filter(pl.col("parent_pair").is_not_null() & (pl.col("parent_pair") != ""))
+    )
+    return dict(zip(subset["shipment_id"].to_list(), subset["parent_pair"].to_list()))
 
 
 def _summarise_shipment_timeline(
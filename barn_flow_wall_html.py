@@ -18,11 +18,12 @@ import polars as pl
 
 from analysis.barn_flow import BarnFlow, BarnFlowBuilder
 from barn_flow_graph import build_context, render_svg
+from flow_writer import with_event_dt
 
 
 def load_flow(path: Path) -> pl.DataFrame:
     df = pl.read_parquet(path)
-    return df.with_columns(pl.col("event_ts").str.strptime(pl.Datetime, strict=False).alias("event_dt"))
+    return with_event_dt(df)
 
 
 def find_barns(flow: pl.DataFrame, prefix: str) -> List[str]:
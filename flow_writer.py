@@ -12,12 +12,25 @@ FLOW_SCHEMA = {
     "resource_type": pl.Utf8,
     "from_state": pl.Utf8,
     "to_state": pl.Utf8,
-    "event_ts": pl.Utf8,
+    "event_ts": pl.Datetime("us"),
     "quantity": pl.Float64,
     "metadata": pl.Utf8,
 }
 
 
+def with_event_dt(frame: pl.DataFrame, name: str = "event_dt") -> pl.DataFrame:
+    """Add the `event_dt` datetime column the readers sort and filter on.
+
+    `event_ts` is written as a Parquet timestamp, so this is a plain alias;
+    flow logs written before that change still hold ISO strings and are parsed.
+    Pass `name="event_ts"` to convert the column in place instead.
+    """
+    ts = pl.col("event_ts")
+    if frame.schema["event_ts"] == pl.Utf8:
+        ts = ts.str.strptime(pl.Datetime("us"), strict=False)
+    return frame.with_columns(ts.alias(name))
+
+
 class FlowWriter:
     """Append-only Parquet/Polars sink for resource flow events."""
 
@@ -53,9 +66,13 @@ class FlowWriter:
     def close(self) -> None:
         if not self._buffer:
             return
-        df = pl.DataFrame(self._buffer, schema=FLOW_SCHEMA)
+        # Rows carry ISO strings; parse the column once here so readers get a
+        # native timestamp instead of re-parsing on every load.
+        df = with_event_dt(
+            pl.DataFrame(self._buffer, schema={**FLOW_SCHEMA, "event_ts": pl.Utf8}), name="event_ts"
+        )
         if self.path.exists():
-            existing = pl.read_parquet(self.path)
+            existing = with_event_dt(pl.read_parquet(self.path), name="event_ts")
             df = pl.concat([existing, df], how="vertical")
         df.write_parquet(self.path)
         self._buffer.clear()
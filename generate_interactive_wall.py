@@ -10,12 +10,11 @@ import polars as pl
 from analysis.barn_flow import BarnFlowBuilder
 from barn_flow_graph_html import build_html_page as build_single_html
 from barn_flow_graph import render_svg, build_context
+from flow_writer import with_event_dt
 
 
 def load_flow(path: Path) -> pl.DataFrame:
-    return pl.read_parquet(path).with_columns(
-        pl.col("event_ts").str.strptime(pl.Datetime, strict=False).alias("event_dt")
-    )
+    return with_event_dt(pl.read_parquet(path))
 
 
 def find_barns(flow: pl.DataFrame, prefix: str) -> List[str]:
@@ -12,15 +12,14 @@ import polars as pl
 
 from analysis.barn_flow import BarnFlow, BarnFlowBuilder
 from barn_flow_graph import build_telep_context, render_telep_svg
+from flow_writer import with_event_dt
 
 
 def load_flow(path: Path) -> pl.DataFrame:
     if not path.exists():
         raise SystemExit(f"flow log not found: {path}")
     frame = pl.read_parquet(path)
-    return frame.with_columns(
-        pl.col("event_ts").str.strptime(pl.Datetime, strict=False).alias("event_dt")
-    )
+    return with_event_dt(frame)
 
 
 def find_barns(flow: pl.DataFrame, telep: str) -> List[str]:
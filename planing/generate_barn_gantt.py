@@ -32,6 +32,7 @@ import sys
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from flow_writer import with_event_dt
 from simulation.config import SimulationConfig
 
 MS_PER_SECOND = 1000
@@ -126,9 +127,7 @@ def load_barn_events(path: Path) -> pl.DataFrame:
     df = df.filter(pl.col("resource_type") == "barn")
     if df.is_empty():
         raise SystemExit("No barn events found in flow log.")
-    return df.with_columns(
-        pl.col("event_ts").str.strptime(pl.Datetime, strict=False).alias("event_dt")
-    ).sort(["resource_id", "event_dt"])
+    return with_event_dt(df).sort(["resource_id", "event_dt"])
 
 
 def derive_tasks(flow: pl.DataFrame, cycle: CycleSpec) -> Tuple[List[TaskRecord], List[str]]:
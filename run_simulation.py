@@ -1,23 +1,25 @@
 """Full simulation run entry point.
 
 Writes a fresh SQLite events DB (optional) and a Parquet flow log consumed by
-the graphing tools. Use `quick_run.py` for a short test run.
+the graphing tools. Use `quick_run.py` for a short test run; it shares the
+`main()` below with a shortened configuration.
 """
 
 import argparse
 from pathlib import Path
+from typing import Optional
 
-from simulation.config import SimulationConfig, derive_capacity
-from simulation.logger import EventLogger, NoOpEventLogger
+from simulation.config import CapacityPlan, SimulationConfig, derive_capacity
+from simulation.logger import NO_OP_LOGGER, EventLogger
 from simulation.model import ChickSimulation
 
 
 def _build_logger(cfg: SimulationConfig, audit: bool):
-    return EventLogger(cfg.db_path) if audit else NoOpEventLogger()
+    return EventLogger(cfg.db_path) if audit else NO_OP_LOGGER
 
 
-def _parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Run the full hatchery simulation")
+def _parse_args(description: str) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
     parser.add_argument(
         "--mode",
         choices=("exec", "debug"),
@@ -27,25 +29,7 @@ def _parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def main() -> None:
-    """Execute a simulation run and print capacity/throughput metrics."""
-    args = _parse_args()
-    cfg = SimulationConfig()
-    plan = derive_capacity(cfg)
-
-    db_path = Path(cfg.db_path)
-    if db_path.exists():
-        db_path.unlink()
-    flow_path = Path(cfg.flow_log_path)
-    if flow_path.exists():
-        flow_path.unlink()
-
-    logger = _build_logger(cfg, audit=args.mode == "debug")
-    simulation = ChickSimulation(cfg, logger)
-    simulation.run()
-    summary = simulation.summarize()
-    logger.close()
-
+def _print_plan(plan: CapacityPlan) -> None:
     print("Capacity plan:")
     print(f"  Eggs per day required: {plan.eggs_per_day_required:,.0f}")
     print(f"  Shipments per day: {plan.shipments_per_day:,.2f}")
@@ -53,12 +37,43 @@ def main() -> None:
     print(f"  Pre-hatch slots needed: {plan.pre_hatch_slots_needed:,.1f}")
     print(f"  Hatch slots needed: {plan.hatch_slots_needed:,.1f}")
 
+
+def main(
+    cfg: Optional[SimulationConfig] = None,
+    description: str = "Run the full hatchery simulation",
+    report: bool = True,
+) -> None:
+    """Execute a simulation run and print capacity/throughput metrics.
+
+    `quick_run.py` calls this with a shortened config and `report=False`, in
+    which case only the flow log location is printed.
+    """
+    args = _parse_args(description)
+    cfg = cfg or SimulationConfig()
+
+    # Clean previous outputs
+    db_path = Path(cfg.db_path)
+    db_path.unlink(missing_ok=True)
+    flow_path = Path(cfg.flow_log_path)
+    flow_path.unlink(missing_ok=True)
+
+    with _build_logger(cfg, audit=args.mode == "debug") as logger:
+        simulation = ChickSimulation(cfg, logger)
+        simulation.run()
+
+    if not report:
+        print(f"Flow written to: {flow_path.resolve()}")
+        return
+
+    summary = simulation.summarize()
+    _print_plan(derive_capacity(cfg))
+
     print("\nSimulation summary:")
     avg_slaughter = summary["avg_slaughter_per_day"]
     if avg_slaughter is None:
         print("  Not enough data beyond warmup period to compute average.")
     else:
-    print(f"  Average slaughter-ready chickens per day: {avg_slaughter:,.0f}")
+        print(f"  Average slaughter-ready chickens per day: {avg_slaughter:,.0f}")
     print(f"  Total slaughtered over run: {summary['total_slaughtered']:,}")
     if args.mode == "debug":
         print(f"  Events stored in SQLite at: {db_path.resolve()}")
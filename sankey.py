@@ -11,14 +11,18 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import shutil
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, Tuple
+from typing import Iterable, Tuple
 
 import polars as pl
 
+from analysis.barn_flow import extract_parent_map
+from flow_writer import with_event_dt
+
 DEFAULT_FLOW_LOG = Path("flow_log.parquet")
 HCHARTS_DIR = Path("Highcharts-12/code")
 
@@ -59,23 +63,7 @@ def load_flow(path: Path) -> pl.DataFrame:
     if not path.exists():
         raise SystemExit(f"flow log not found: {path}")
     frame = pl.read_parquet(path)
-    return frame.with_columns(
-        pl.col("event_ts").str.strptime(pl.Datetime, strict=False).alias("event_dt")
-    )
-
-
-def build_parent_map_from_parquet(flow: pl.DataFrame) -> Dict[str, str]:
-    pairs: Dict[str, str] = {}
-    subset = flow.filter(pl.col("resource_type") == "inventory").select([
-        pl.col("shipment_id"),
-        pl.col("metadata"),
-    ])
-    for row in subset.iter_rows(named=True):
-        meta = decode_json(row["metadata"]) if row["metadata"] else {}
-        pp = meta.get("parent_pair")
-        if pp:
-            pairs[str(row["shipment_id"])] = str(pp)
-    return pairs
+    return with_event_dt(frame)
 
 
 def barn_snapshot(
@@ -113,19 +101,22 @@ def barn_snapshot(
 def extract_cart_flows(shipment_rows: pl.DataFrame) -> dict[str, CartFlow]:
     carts: dict[str, CartFlow] = {}
 
-    for row in shipment_rows.filter(pl.col("resource_type") == "setter_slot").iter_rows(named=True):
-        details = decode_json(row["to_state"])
-        cart_id = str(details.get("cart_id")) if "cart_id" in details else None
-        if not cart_id:
+    # One pass over the slot rows; setter and hatcher rows keep their relative order.
+    slot_rows = shipment_rows.filter(pl.col("resource_type").is_in(["setter_slot", "hatcher_slot"]))
+    for row in slot_rows.iter_rows(named=True):
+        resource_id = str(row["resource_id"])
+        if row["resource_type"] == "setter_slot":
+            details = decode_json(row["to_state"])
+            cart_id = str(details.get("cart_id")) if "cart_id" in details else None
+            if not cart_id:
+                continue
+            entry = carts.get(cart_id)
+            if entry is None:
+                carts[cart_id] = CartFlow(cart_id, setter_id=resource_id, hatcher_id=None, chicks=0.0, losses=0.0)
+            else:
+                entry.setter_id = resource_id
             continue
-        entry = carts.get(cart_id)
-        if entry is None:
-            entry = CartFlow(cart_id, setter_id=str(row["resource_id"]), hatcher_id=None, chicks=0.0, losses=0.0)
-            carts[cart_id] = entry
-        else:
-            entry.setter_id = str(row["resource_id"])
 
-    for row in shipment_rows.filter(pl.col("resource_type") == "hatcher_slot").iter_rows(named=True):
         info_from = decode_json(row["from_state"])
         info_to = decode_json(row["to_state"])
         cart_id = info_from.get("cart_id") or info_to.get("cart_id")
@@ -134,51 +125,90 @@ def extract_cart_flows(shipment_rows: pl.DataFrame) -> dict[str, CartFlow]:
         cart_id = str(cart_id)
         entry = carts.get(cart_id)
         if entry is None:
-            entry = CartFlow(cart_id, setter_id=None, hatcher_id=str(row["resource_id"]), chicks=0.0, losses=0.0)
+            entry = CartFlow(cart_id, setter_id=None, hatcher_id=resource_id, chicks=0.0, losses=0.0)
             carts[cart_id] = entry
         else:
-            entry.hatcher_id = str(row["resource_id"])
+            entry.hatcher_id = resource_id
         entry.chicks = float(info_to.get("chicks", row["quantity"] or 0.0))
         entry.losses = float(info_to.get("losses", 0.0))
 
     return {cid: flow for cid, flow in carts.items() if flow.chicks > 0}
 
 
+# Sankey column per node kind; callers pass these directly since each call
+# site knows its kind statically.
+COL_PARENT = 0
+COL_SETTER = 1
+COL_HATCHER = 2
+COL_BARN = 3
+
+
+def ensure_node(
+    nodes: dict[str, dict[str, object]], kind: str, column: int, identifier: str, name: str
+) -> str:
+    key = f"{kind}::{identifier}"
+    if key not in nodes:
+        nodes[key] = {
+            "id": key,
+            "name": name,
+            "type": kind,
+            "column": column,
+        }
+    return key
+
+
+@dataclass
+class LinkColumns:
+    """Link rows collected column-wise; duplicates are summed once in `aggregate`."""
+
+    sources: list[str] = field(default_factory=list)
+    targets: list[str] = field(default_factory=list)
+    weights: list[float] = field(default_factory=list)
+
+    def aggregate(self) -> list[dict[str, object]]:
+        frame = (
+            pl.DataFrame(
+                {"from": self.sources, "to": self.targets, "weight": self.weights},
+                schema={"from": pl.Utf8, "to": pl.Utf8, "weight": pl.Float64},
+            )
+            .group_by(["from", "to"])
+            .agg(pl.col("weight").sum())
+            .sort(["from", "to"])
+        )
+        return frame.to_dicts()
+
+
+def add_link(links: LinkColumns, source: str, target: str, weight: float) -> None:
+    if weight <= 0:
+        return
+    links.sources.append(source)
+    links.targets.append(target)
+    links.weights.append(weight)
+
+
 def build_sankey(
     flow: pl.DataFrame,
     farm: str,
     cutoff: datetime,
 ) -> SankeyPayload:
     barns, farm_shipments = barn_snapshot(flow, farm, cutoff)
-    parent_map = build_parent_map_from_parquet(flow)
+    parent_map = extract_parent_map(flow)
 
-    links: dict[Tuple[str, str], float] = defaultdict(float)
+    links = LinkColumns()
     nodes: dict[str, dict[str, object]] = {}
     shipments_meta: list[dict[str, object]] = []
 
-    def node_id(kind: str, identifier: str) -> str:
-        return f"{kind}::{identifier}"
-
-    def ensure_node(kind: str, identifier: str, name: str) -> str:
-        key = node_id(kind, identifier)
-        if key not in nodes:
-            column_map = {"parent": 0, "setter": 1, "hatcher": 2, "barn": 3}
-            nodes[key] = {
-                "id": key,
-                "name": name,
-                "type": kind,
-                "column": column_map.get(kind, 0),
-            }
-        return key
-
-    def add_link(source: str, target: str, weight: float) -> None:
-        if weight <= 0:
-            return
-        links[(source, target)] += weight
+    # Partition once instead of re-filtering the whole frame per shipment.
+    by_shipment = {
+        key[0]: frame
+        for key, frame in flow.filter(pl.col("shipment_id").is_in(list(farm_shipments)))
+        .partition_by("shipment_id", as_dict=True)
+        .items()
+    }
 
     for shipment_id, farm_total in farm_shipments.items():
-        shipment_rows = flow.filter(pl.col("shipment_id") == shipment_id)
-        if shipment_rows.is_empty():
+        shipment_rows = by_shipment.get(shipment_id)
+        if shipment_rows is None:
             continue
         carts = extract_cart_flows(shipment_rows)
         if not carts:
@@ -188,7 +218,7 @@ def build_sankey(
             continue
         parent_pair = parent_map.get(shipment_id, "ismeretlen")
         parent_label = f"Szülőpár {parent_pair.split('-')[-1]}" if parent_pair != "ismeretlen" else "Szülőpár ?"
-        parent_node = ensure_node("parent", parent_pair, parent_label)
+        parent_node = ensure_node(nodes, "parent", COL_PARENT, parent_pair, parent_label)
 
         shipment_barns = {
             barn_id: shipments[shipment_id]
@@ -209,26 +239,23 @@ def build_sankey(
 
         for cart in carts.values():
             setter_label = f"Előkeltető {cart.setter_id}" if cart.setter_id else "Előkeltető ?"
-            setter_node = ensure_node("setter", cart.setter_id or f"missing-{cart.cart_id}", setter_label)
+            setter_node = ensure_node(nodes, "setter", COL_SETTER, cart.setter_id or f"missing-{cart.cart_id}", setter_label)
             hatcher_label = f"Utókeltető {cart.hatcher_id}" if cart.hatcher_id else "Utókeltető ?"
-            hatcher_node = ensure_node("hatcher", cart.hatcher_id or f"missing-{cart.cart_id}", hatcher_label)
+            hatcher_node = ensure_node(nodes, "hatcher", COL_HATCHER, cart.hatcher_id or f"missing-{cart.cart_id}", hatcher_label)
 
             parent_share = (farm_total / total_chicks) if total_chicks else 0.0
             cart_weight = cart.chicks * parent_share
-            add_link(parent_node, setter_node, cart_weight)
-            add_link(setter_node, hatcher_node, cart_weight)
+            add_link(links, parent_node, setter_node, cart_weight)
+            add_link(links, setter_node, hatcher_node, cart_weight)
 
             for barn_id, barn_qty in shipment_barns.items():
                 barn_share = barn_qty / total_chicks
                 barn_weight = cart.chicks * barn_share
-                barn_node = ensure_node("barn", barn_id, barn_id)
-                add_link(hatcher_node, barn_node, barn_weight)
+                barn_node = ensure_node(nodes, "barn", COL_BARN, barn_id, barn_id)
+                add_link(links, hatcher_node, barn_node, barn_weight)
 
     node_list = list(nodes.values())
-    link_list = [
-        {"from": source, "to": target, "weight": weight}
-        for (source, target), weight in sorted(links.items())
-    ]
+    link_list = links.aggregate()
     meta = {
         "farm": farm,
         "timestamp": cutoff.isoformat(),
@@ -237,14 +264,20 @@ def build_sankey(
     return SankeyPayload(nodes=node_list, links=link_list, metadata=meta)
 
 
-def write_json(payload: SankeyPayload, output: Path) -> None:
+def _dumps(obj: object, pretty: bool = False) -> str:
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def write_json(payload: SankeyPayload, output: Path, pretty: bool = False) -> None:
     output.parent.mkdir(parents=True, exist_ok=True)
     content = {
         "nodes": payload.nodes,
         "data": payload.links,
         "metadata": payload.metadata,
     }
-    output.write_text(json.dumps(content, indent=2, ensure_ascii=False))
+    output.write_text(_dumps(content, pretty))
 
 
 def write_html(
@@ -282,42 +315,47 @@ def write_html(
     if not hc_path.exists() or not sankey_module.exists():
         raise SystemExit("Highcharts sources not found. Please copy Highcharts-12/code into the project root.")
 
-    if inline_assets:
-        hc_js = hc_path.read_text(encoding="utf-8")
-        sankey_js = sankey_module.read_text(encoding="utf-8")
-        loader_block = f"<script>{hc_js}</script>\n  <script>{sankey_js}</script>"
-    else:
-        rel_hc = Path(os.path.relpath(hc_path, output.parent)).as_posix()
-        rel_sankey = Path(os.path.relpath(sankey_module, output.parent)).as_posix()
-        loader_block = f'<script src="{rel_hc}"></script>\n  <script src="{rel_sankey}"></script>'
-
-    html = """<!DOCTYPE html>
-<html lang=\"hu\">
-<head>
-  <meta charset=\"utf-8\" />
-  <title>{title}</title>
-  <style>
-    body {{ font-family: Arial, sans-serif; margin: 0; padding: 0; background: #f5f5f5; }}
-    #sankey-container {{ min-height: 640px; margin: 0 auto; max-width: 1280px; padding: 24px; background: #ffffff; }}
-  </style>
-</head>
-<body>
-  <div id=\"sankey-container\"></div>
-  {loader}
-  <script>
-    const payload = {data_json};
-    const options = {options_json};
-    Highcharts.chart('sankey-container', options);
-  </script>
-</body>
-</html>
-""".format(
-        title=chart_options["title"]["text"],
-        loader=loader_block,
-        data_json=json.dumps(data, ensure_ascii=False),
-        options_json=json.dumps(chart_options, ensure_ascii=False),
+    head = (
+        "<!DOCTYPE html>\n"
+        "<html lang=\"hu\">\n"
+        "<head>\n"
+        "  <meta charset=\"utf-8\" />\n"
+        "  <title>" + chart_options["title"]["text"] + "</title>\n"
+        "  <style>\n"
+        "    body { font-family: Arial, sans-serif; margin: 0; padding: 0; background: #f5f5f5; }\n"
+        "    #sankey-container { min-height: 640px; margin: 0 auto; max-width: 1280px; padding: 24px; background: #ffffff; }\n"
+        "  </style>\n"
+        "</head>\n"
+        "<body>\n"
+        "  <div id=\"sankey-container\"></div>\n"
+        "  "
     )
-    output.write_text(html)
+    tail = (
+        "\n  <script>\n"
+        "    const payload = " + _dumps(data) + ";\n"
+        "    const options = " + _dumps(chart_options) + ";\n"
+        "    Highcharts.chart('sankey-container', options);\n"
+        "  </script>\n"
+        "</body>\n"
+        "</html>\n"
+    )
+
+    # Stream the page so the multi-megabyte Highcharts sources are copied
+    # straight into the output instead of being held in (and scanned by) a
+    # format string.
+    with output.open("w", encoding="utf-8") as fh:
+        fh.write(head)
+        if inline_assets:
+            for index, asset in enumerate((hc_path, sankey_module)):
+                fh.write("<script>" if index == 0 else "\n  <script>")
+                with asset.open("r", encoding="utf-8") as src:
+                    shutil.copyfileobj(src, fh)
+                fh.write("</script>")
+        else:
+            rel_hc = Path(os.path.relpath(hc_path, output.parent)).as_posix()
+            rel_sankey = Path(os.path.relpath(sankey_module, output.parent)).as_posix()
+            fh.write(f'<script src="{rel_hc}"></script>\n  <script src="{rel_sankey}"></script>')
+        fh.write(tail)
 
 
 def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
@@ -328,6 +366,7 @@ def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
     parser.add_argument("--out-json", help="Optional JSON output path")
     parser.add_argument("--out-html", help="Optional HTML output path")
     parser.add_argument("--title", help="Optional chart title override")
+    parser.add_argument("--pretty", action="store_true", help="Indent JSON output for human inspection")
     return parser.parse_args(argv)
 
 
@@ -338,15 +377,15 @@ def main() -> None:
     payload = build_sankey(flow, args.farm, cutoff)
 
     if args.out_json:
-        write_json(payload, Path(args.out_json))
+        write_json(payload, Path(args.out_json), pretty=args.pretty)
     if args.out_html:
         write_html(payload, Path(args.out_html), args.title)
     if not args.out_json and not args.out_html:
-        print(json.dumps({
+        print(_dumps({
             "nodes": payload.nodes,
             "data": payload.links,
             "metadata": payload.metadata,
-        }, indent=2, ensure_ascii=False))
+        }, args.pretty))
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI entry point
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Sequence, Tuple
 
@@ -13,12 +14,11 @@ class FarmSpec:
     name: str
     capacity_chicks: int
     barns: int = 5
+    capacity_per_barn: Tuple[int, int] = field(init=False, repr=False, compare=False)
 
-    @property
-    def capacity_per_barn(self) -> Tuple[int, int]:
-        base = self.capacity_chicks // self.barns
-        remainder = self.capacity_chicks % self.barns
-        return base, remainder
+    def __post_init__(self) -> None:
+        # Frozen, so the (base, remainder) split is computed once per spec.
+        object.__setattr__(self, "capacity_per_barn", divmod(self.capacity_chicks, self.barns))
 
 
 @dataclass(frozen=True)
@@ -62,6 +62,25 @@ class SimulationConfig:
     start_date: datetime = datetime(2025, 1, 1)
     flow_log_path: Path = Path("flow_log.parquet")
 
+    # Beta-distribution means, derived once from the alpha/beta fields above.
+    xray_pass_mean: float = field(init=False, repr=False, compare=False)
+    hatch_success_mean: float = field(init=False, repr=False, compare=False)
+    farm_survival_mean: float = field(init=False, repr=False, compare=False)
+    # Hour-denominated durations converted to simulation days once.
+    sort_and_vaccinate_days: float = field(init=False, repr=False, compare=False)
+    load_to_transport_days: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Keep the config hashable (derive_capacity is cached on it) even when
+        # ranges are passed as lists.
+        object.__setattr__(self, "hatch_days_range", tuple(self.hatch_days_range))
+        object.__setattr__(self, "grow_out_days_range", tuple(self.grow_out_days_range))
+        object.__setattr__(self, "xray_pass_mean", self.xray_alpha / (self.xray_alpha + self.xray_beta))
+        object.__setattr__(self, "hatch_success_mean", self.hatch_alpha / (self.hatch_alpha + self.hatch_beta))
+        object.__setattr__(self, "farm_survival_mean", self.farm_alpha / (self.farm_alpha + self.farm_beta))
+        object.__setattr__(self, "sort_and_vaccinate_days", self.sort_and_vaccinate_hours / 24)
+        object.__setattr__(self, "load_to_transport_days", self.load_to_transport_hours / 24)
+
     @property
     def farm_specs(self) -> Sequence[FarmSpec]:
         """Return the configured farm capacities (net placement, converted to chicks)."""
@@ -90,16 +109,16 @@ class CapacityPlan:
     chicks_per_day_to_farms: float
 
 
+@lru_cache(maxsize=None)
 def derive_capacity(cfg: SimulationConfig) -> CapacityPlan:
-    """Calculate steady-state capacity requirements for the supplied configuration."""
+    """Calculate steady-state capacity requirements for the supplied configuration.
 
-    farm_survival_mean = cfg.farm_alpha / (cfg.farm_alpha + cfg.farm_beta)
-    hatch_success_mean = cfg.hatch_alpha / (cfg.hatch_alpha + cfg.hatch_beta)
-    xray_pass_mean = cfg.xray_alpha / (cfg.xray_alpha + cfg.xray_beta)
+    Both the config and the plan are frozen, so results are cached per config.
+    """
 
-    chicks_to_farms = cfg.target_slaughter_per_day / farm_survival_mean
-    eggs_after_hatch = chicks_to_farms / hatch_success_mean
-    eggs_needed = eggs_after_hatch / xray_pass_mean
+    chicks_to_farms = cfg.target_slaughter_per_day / cfg.farm_survival_mean
+    eggs_after_hatch = chicks_to_farms / cfg.hatch_success_mean
+    eggs_needed = eggs_after_hatch / cfg.xray_pass_mean
     eggs_needed *= cfg.overproduction_factor
 
     pre_hatch_carts_per_day = eggs_needed / cfg.pre_hatch_cart_eggs
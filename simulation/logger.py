@@ -3,8 +3,69 @@ try:
     import sqlite3  # type: ignore
 except Exception:  # pragma: no cover - optional fallback when sqlite3 is unavailable
     sqlite3 = None  # type: ignore
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional speedup; stdlib json is used otherwise
+    orjson = None  # type: ignore
+import queue
+import threading
+import time
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+_STOP = object()  # writer-thread shutdown sentinel
+
+
+def _json_default(value: Any) -> Any:
+    """Convert NumPy scalars and arrays, which stdlib json cannot encode."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize metadata compactly, preferring orjson when it is installed.
+
+    NumPy values are accepted either way; anything orjson still rejects (e.g.
+    integers beyond 64 bits) goes through stdlib json instead.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            ).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=True, separators=(",", ":"), default=_json_default)
+
+
+class _Codes(dict):
+    """Name -> integer id map that assigns the next id to unseen names.
+
+    Newly assigned `(id, name)` pairs wait in `pending` until the writer
+    inserts them alongside the batch that first uses them. `names` is the
+    reverse id -> name map.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, int]]) -> None:
+        super().__init__(rows)
+        self.names: Dict[int, str] = {code: name for name, code in self.items()}
+        self.pending: List[Tuple[int, str]] = []
+        self._next = max(self.values(), default=0) + 1
+
+    def __missing__(self, name: str) -> int:
+        code = self[name] = self._next
+        self._next += 1
+        self.names[code] = name
+        self.pending.append((code, name))
+        return code
+
+    def take_pending(self) -> List[Tuple[int, str]]:
+        pending, self.pending = self.pending, []
+        return pending
 
 
 class EventLogger:
@@ -13,36 +74,189 @@ class EventLogger:
     Graphs and analysis do not depend on SQLite. This logger is used for audit and
     debugging. If the `sqlite3` Python module is unavailable in the runtime, it
     falls back to appending JSON lines to `<db_path>.jsonl` so that runs are not
-blocked by environment limitations.
-"""
+    blocked by environment limitations.
+
+    SQLite writes run on a background thread: full batches are handed over a
+    bounded queue and committed there, so the simulation does not wait on
+    commits. A writer error is re-raised by the next batch hand-off and by
+    `close()`, which drains the queue. Use the logger as a context manager so
+    queued batches are committed even when the run raises.
+
+    Schema version 1 (`PRAGMA user_version`) declares `id INTEGER PRIMARY KEY`
+    without AUTOINCREMENT, so inserts skip the `sqlite_sequence` update. Ids
+    are still increasing since rows are never deleted. Older databases are
+    rebuilt in place when opened.
 
-    def __init__(self, db_path: str) -> None:
-        """Initialize the database connection; fallback to JSONL if sqlite3 unavailable."""
+    Schema version 2 stores `sim_day` as INTEGER ticks (`TICKS_PER_DAY` per
+    simulated day, i.e. seconds) and declares the table STRICT where SQLite
+    supports it (3.37+). Divide `event_log.sim_day` by `TICKS_PER_DAY` to get
+    days back.
+
+    Schema version 3 interns `stage` and `status` into the `stages` and
+    `statuses` lookup tables; rows live in `event_log` with integer codes and
+    the `events` view joins the names back, so readers query it unchanged.
+
+    Schema version 4 has the `events` view convert `sim_day` back to REAL
+    days, so queries such as `CAST(sim_day AS INT)` still group by day.
+
+    `metadata` stays JSON TEXT rather than a binary BLOB: readers filter on it
+    with `json_extract` (see the farm expression index), which needs text.
+    Use `decode_metadata` to turn a fetched value back into a dict.
+    """
+
+    _EMPTY_PAYLOAD = "{}"
+    _SCHEMA_VERSION = 4
+    TICKS_PER_DAY = 86_400
+    # PRAGMAs callers may override via `pragmas=`; names are interpolated into
+    # SQL, so anything outside this set is rejected.
+    _ALLOWED_PRAGMAS = frozenset({
+        "busy_timeout", "cache_size", "journal_mode", "locking_mode",
+        "mmap_size", "synchronous", "temp_store", "wal_autocheckpoint",
+    })
+    # Recommended override sets. "fast" trades crash durability for insert
+    # speed and suits short throwaway runs.
+    PRAGMA_PROFILES: Dict[str, Dict[str, str]] = {
+        "fast": {"synchronous": "OFF", "journal_mode": "MEMORY", "temp_store": "MEMORY"},
+    }
+    _LOOKUP_DDL = (
+        "CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE){strict}"
+    )
+    _EVENTS_DDL = """
+        CREATE TABLE IF NOT EXISTS event_log (
+            id INTEGER PRIMARY KEY,
+            sim_day INTEGER NOT NULL,
+            real_ts TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            stage_id INTEGER NOT NULL REFERENCES stages(id),
+            status_id INTEGER NOT NULL REFERENCES statuses(id),
+            quantity REAL,
+            metadata TEXT
+        ){strict}
+    """
+    _EVENTS_VIEW = f"""
+        CREATE VIEW IF NOT EXISTS events AS
+        SELECT e.id, e.sim_day * 1.0 / {TICKS_PER_DAY} AS sim_day, e.real_ts, e.entity_id,
+               s.name AS stage, t.name AS status, e.quantity, e.metadata
+        FROM event_log AS e
+        JOIN stages AS s ON s.id = e.stage_id
+        JOIN statuses AS t ON t.id = e.status_id
+    """
+    _ROW_FIELDS = ("sim_day", "real_ts", "entity_id", "stage", "status", "quantity")
+    _INSERT_SQL = (
+        "INSERT INTO event_log (sim_day, real_ts, entity_id, stage_id, status_id, quantity, metadata) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        temp_store: str = "MEMORY",
+        cache_size: int = -65536,
+        mmap_size: int = 10_737_418_240,
+        busy_timeout: int = 5000,
+        auto_timestamp: bool = False,
+        pragmas: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        """Initialize the database connection; fallback to JSONL if sqlite3 unavailable.
+
+        The keyword arguments tune the write-heavy PRAGMA set applied alongside
+        WAL: temp B-trees in memory, a 64 MiB page cache (negative = KiB), a
+        memory-mapped database file and a lock wait timeout in milliseconds.
+        `pragmas` overrides any of these (or `journal_mode`/`synchronous`)
+        before the schema is written, e.g. `PRAGMA_PROFILES["fast"]`.
+
+        With `auto_timestamp`, events logged without `real_ts` get the wall
+        clock time sampled at the last batch flush instead of an empty string.
+        """
         self.db_path = Path(db_path)
-        self._pending = 0
+        self._buf: List[Tuple[Any, ...]] = []
         self._batch_size = 1000
-        self._jsonl_path = self.db_path.with_suffix('.jsonl')
+        self._jsonl_fh = None
+        self._writer: Optional[threading.Thread] = None
+        self._writer_error: Optional[BaseException] = None
+        self._auto_timestamp = auto_timestamp
+        self._cached_ts = ""
+        self._refresh_timestamp()
         if sqlite3 is None:
             self.conn = None
+            # One long-lived handle; lines are buffered and written per batch.
+            self._jsonl_fh = self.db_path.with_suffix('.jsonl').open('a', encoding='utf-8')
         else:
-            self.conn = sqlite3.connect(self.db_path)
+            # Autocommit mode: the driver issues no implicit BEGIN/COMMIT, so
+            # _flush and _ensure_schema own their transactions explicitly.
+            self.conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
             self.conn.execute("PRAGMA journal_mode=WAL")
             self.conn.execute("PRAGMA synchronous=NORMAL")
+            if temp_store.upper() not in {"DEFAULT", "FILE", "MEMORY"}:
+                raise ValueError(f"Invalid temp_store: {temp_store!r}")
+            self.conn.execute(f"PRAGMA temp_store={temp_store}")
+            self.conn.execute(f"PRAGMA cache_size={int(cache_size)}")
+            self.conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+            self.conn.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+            for name, value in (pragmas or {}).items():
+                if name not in self._ALLOWED_PRAGMAS:
+                    raise ValueError(f"Unsupported pragma: {name!r}")
+                if not str(value).lstrip("-").isalnum():
+                    raise ValueError(f"Invalid value for pragma {name}: {value!r}")
+                self.conn.execute(f"PRAGMA {name}={value}")
+            self._ensure_schema()
+            self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=8)
+            self._writer = threading.Thread(
+                target=self._writer_loop, name="event-logger-writer", daemon=True
+            )
+            self._writer.start()
+
+    def _ensure_schema(self) -> None:
+        """Create (or migrate) the event tables, the `events` view and its indexes."""
+        self.conn.execute("BEGIN")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        legacy = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events'"
+        ).fetchone()
+        strict = " STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
+        for table in ("stages", "statuses"):
+            self.conn.execute(self._LOOKUP_DDL.format(table=table, strict=strict))
+        self.conn.execute(self._EVENTS_DDL.format(strict=strict))
+        if legacy:
+            # Pre-v3 databases keep names inline in an `events` table (pre-v2
+            # also with REAL sim_day); move the rows behind the view.
+            sim_day = "e.sim_day" if version >= 2 else (
+                f"CAST(ROUND(e.sim_day * {self.TICKS_PER_DAY}) AS INTEGER)"
+            )
+            self.conn.execute("INSERT OR IGNORE INTO stages (name) SELECT DISTINCT stage FROM events")
+            self.conn.execute("INSERT OR IGNORE INTO statuses (name) SELECT DISTINCT status FROM events")
             self.conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sim_day REAL NOT NULL,
-                    real_ts TEXT NOT NULL,
-                    entity_id TEXT NOT NULL,
-                    stage TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    quantity REAL,
-                    metadata TEXT
-                )
-                """
+                "INSERT INTO event_log "
+                "(id, sim_day, real_ts, entity_id, stage_id, status_id, quantity, metadata) "
+                f"SELECT e.id, {sim_day}, e.real_ts, e.entity_id, s.id, t.id, e.quantity, e.metadata "
+                "FROM events AS e "
+                "JOIN stages AS s ON s.name = e.stage "
+                "JOIN statuses AS t ON t.name = e.status"
             )
-            self.conn.commit()
+            self.conn.execute("DROP TABLE events")
+        elif version < 4:
+            # v3 views exposed raw ticks; recreate the view in days.
+            self.conn.execute("DROP VIEW IF EXISTS events")
+        self.conn.execute(self._EVENTS_VIEW)
+        # Readers (tools.get_farm_mix, barn_flow_graph's sqlite3 CLI fallback)
+        # filter on stage/status/entity_id; keep those lookups off a table scan.
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_events_stage_status_entity "
+            "ON event_log(stage_id, status_id, entity_id)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_events_entity ON event_log(entity_id, id)"
+        )
+        # Expression index so farm lookups avoid a `metadata LIKE` full scan.
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_events_farm_expr "
+            "ON event_log(json_extract(metadata, '$.farm'), real_ts)"
+        )
+        self._stages = _Codes(self.conn.execute("SELECT name, id FROM stages"))
+        self._statuses = _Codes(self.conn.execute("SELECT name, id FROM statuses"))
+        self.conn.execute(f"PRAGMA user_version={self._SCHEMA_VERSION}")
+        self.conn.execute("COMMIT")
 
     def log(
         self,
@@ -54,61 +268,193 @@ blocked by environment limitations.
         metadata: Optional[Dict[str, Any]] = None,
         real_ts: Optional[str] = None,
     ) -> None:
-        """Insert an event row, committing in batches for performance."""
-        payload = json.dumps(metadata or {}, ensure_ascii=True)
+        """Buffer an event row; rows are written in batches of `_batch_size`."""
         if self.conn is None:
             # Fallback: append as JSONL so we still have a record stream if needed
             record = {
                 "sim_day": sim_day,
-                "real_ts": real_ts or "",
+                "real_ts": real_ts or self._cached_ts,
                 "entity_id": entity_id,
                 "stage": stage,
                 "status": status,
                 "quantity": quantity,
-                "metadata": json.loads(payload),
+                "metadata": metadata or {},
             }
-            with self._jsonl_path.open('a', encoding='utf-8') as f:
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._buf.append(_dumps(record) + "\n")
         else:
-            self.conn.execute(
-                """
-                INSERT INTO events (sim_day, real_ts, entity_id, stage, status, quantity, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (sim_day, real_ts or "", entity_id, stage, status, quantity, payload),
+            payload = _dumps(metadata) if metadata else self._EMPTY_PAYLOAD
+            ticks = round(sim_day * self.TICKS_PER_DAY)
+            self._buf.append((
+                ticks,
+                real_ts or self._cached_ts,
+                entity_id,
+                self._stages[stage],
+                self._statuses[status],
+                None if quantity is None else float(quantity),
+                payload,
+            ))
+        if len(self._buf) >= self._batch_size:
+            self._flush()
+
+    def log_many(self, rows: Iterable[Tuple[Any, ...]]) -> None:
+        """Buffer pre-built rows, flushing every `_batch_size` rows.
+
+        Rows follow the INSERT column order
+        `(sim_day, real_ts, entity_id, stage, status, quantity, metadata)` with
+        `sim_day` already in ticks and `metadata` serialized to a JSON string.
+        `quantity` is converted to float, since the STRICT table rejects
+        NumPy scalars (they bind as BLOBs).
+        """
+        it = iter(rows)
+        while True:
+            chunk = list(islice(it, self._batch_size - len(self._buf)))
+            if not chunk:
+                return
+            if self.conn is None:
+                chunk = [self._jsonl_line(row) for row in chunk]
+            else:
+                stages, statuses = self._stages, self._statuses
+                chunk = [
+                    (r[0], r[1], r[2], stages[r[3]], statuses[r[4]],
+                     None if r[5] is None else float(r[5]), r[6])
+                    for r in chunk
+                ]
+            self._buf.extend(chunk)
+            if len(self._buf) >= self._batch_size:
+                self._flush()
+
+    def log_many_dicts(self, events: Iterable[Mapping[str, Any]]) -> None:
+        """Bulk variant of `log` taking one mapping of its keyword arguments per event."""
+        empty = self._EMPTY_PAYLOAD
+        ticks = self.TICKS_PER_DAY
+        self.log_many([
+            (
+                round(e["sim_day"] * ticks),
+                e.get("real_ts") or self._cached_ts,
+                e["entity_id"],
+                e["stage"],
+                e["status"],
+                e.get("quantity"),
+                _dumps(e["metadata"]) if e.get("metadata") else empty,
             )
-            self._pending += 1
-            if self._pending >= self._batch_size:
-                self.conn.commit()
-                self._pending = 0
+            for e in events
+        ])
+
+    def resolve_stage(self, stage_id: int) -> str:
+        """Return the stage name stored under `stage_id` in the `stages` table."""
+        return self._stages.names[stage_id]
+
+    def resolve_status(self, status_id: int) -> str:
+        """Return the status name stored under `status_id` in the `statuses` table."""
+        return self._statuses.names[status_id]
+
+    @staticmethod
+    def decode_metadata(value: Optional[Any]) -> Dict[str, Any]:
+        """Decode a stored `metadata` column value (TEXT or bytes) into a dict."""
+        if not value:
+            return {}
+        if orjson is not None:
+            return orjson.loads(value)
+        return json.loads(value)
+
+    def _jsonl_line(self, row: Tuple[Any, ...]) -> str:
+        record = dict(zip(self._ROW_FIELDS, row))
+        record["sim_day"] = row[0] / self.TICKS_PER_DAY
+        record["metadata"] = self.decode_metadata(row[6])
+        return _dumps(record) + "\n"
+
+    def _flush(self) -> None:
+        """Hand buffered rows to the writer thread, or write them as JSONL."""
+        if not self._buf:
+            return
+        if self.conn is None:
+            self._jsonl_fh.writelines(self._buf)
+            self._jsonl_fh.flush()
+            self._buf.clear()
+        else:
+            if self._writer_error is not None:
+                raise self._writer_error
+            # The writer owns the handed-off list; start a fresh buffer.
+            self._queue.put((self._stages.take_pending(), self._statuses.take_pending(), self._buf))
+            self._buf = []
+        self._refresh_timestamp()
+
+    def _writer_loop(self) -> None:
+        """Commit each queued batch in its own transaction until `_STOP` arrives."""
+        conn = self.conn
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if self._writer_error is not None:
+                continue  # keep draining so producers never block on a dead writer
+            new_stages, new_statuses, batch = item
+            try:
+                conn.execute("BEGIN")
+                conn.executemany("INSERT INTO stages (id, name) VALUES (?, ?)", new_stages)
+                conn.executemany("INSERT INTO statuses (id, name) VALUES (?, ?)", new_statuses)
+                conn.executemany(self._INSERT_SQL, batch)
+                conn.execute("COMMIT")
+            except BaseException as exc:  # surfaced by _flush() and close()
+                self._writer_error = exc
+                try:
+                    conn.rollback()  # release the write lock held by the failed batch
+                except sqlite3.Error:
+                    pass
+
+    def _refresh_timestamp(self) -> None:
+        """Sample the wall clock once per batch rather than once per event."""
+        if self._auto_timestamp:
+            self._cached_ts = datetime.fromtimestamp(time.time_ns() / 1e9).isoformat()
 
     def close(self) -> None:
         """Flush any pending inserts and close the database connection."""
         if self.conn is None:
+            self._flush()
+            self._jsonl_fh.close()
+            return
+        try:
+            self._flush()
+        finally:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self.conn.close()
+        if self._writer_error is not None:
+            raise self._writer_error
+
+    def __enter__(self) -> "EventLogger":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.close()
             return
-        if self._pending:
-            self.conn.commit()
-            self._pending = 0
-        self.conn.close()
+        try:
+            self.close()
+        except Exception:
+            pass  # let the run's own exception propagate instead
+
+
+def _noop(*args: Any, **kwargs: Any) -> None:
+    return None
 
 
 class NoOpEventLogger:
-    """Drop-in replacement when audit logging is disabled."""
+    """Drop-in replacement when audit logging is disabled.
 
-    def __init__(self) -> None:
-        self.db_path = Path('')
+    Every method is the same shared no-op held as a staticmethod, so calls skip
+    bound-method creation. Hot paths can go further and skip building their
+    arguments by checking `isinstance(logger, NoOpEventLogger)` once.
+    """
 
-    def log(
-        self,
-        sim_day: float,
-        entity_id: str,
-        stage: str,
-        status: str,
-        quantity: Optional[float] = None,
-        metadata: Optional[Dict[str, Any]] = None,
-        real_ts: Optional[str] = None,
-    ) -> None:
-        return None
+    log = log_many = log_many_dicts = close = staticmethod(_noop)
+    db_path: Optional[Path] = None
 
-    def close(self) -> None:
+    def __enter__(self) -> "NoOpEventLogger":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
         return None
+
+
+NO_OP_LOGGER = NoOpEventLogger()
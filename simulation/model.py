@@ -1,21 +1,53 @@
 from __future__ import annotations
 
 import itertools
-import math
 import random
+import sys
 from dataclasses import dataclass, field
 from datetime import timedelta
-from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import simpy
 
 from .config import CapacityPlan, FarmSpec, SimulationConfig, derive_capacity
 from flow_writer import FlowWriter
-from .logger import EventLogger
+from .logger import EventLogger, NoOpEventLogger
+from .slots import CountingSlots, MachineSlotStore, SlotId
+
+_FARM_DRAW_BATCH = 1024
+# Two-digit id suffixes for cart and truck numbers; larger numbers are formatted on demand.
+_ID_SUFFIXES = tuple(f"{i:02d}" for i in range(100))
+
+# Shared, read-only state dicts for the fixed flow-log transitions.
+_STATUS_EMPTY = {"status": "empty"}
+_STATUS_RELEASED = {"status": "released"}
+_STATUS_BEFORE = {"status": "before"}
+_STATUS_DISCARDED = {"status": "discarded"}
+_STATUS_PRE_PROC = {"status": "pre_processing"}
+_STATUS_PROCESSED = {"status": "processed"}
+_STATUS_SCHEDULED = {"status": "scheduled"}
+_STATUS_LOADING = {"status": "loading"}
+_STATUS_IN_TRANSIT = {"status": "in_transit"}
+_STATUS_ARRIVED = {"status": "arrived"}
+
+
+def _poisson_inverse_cdf(uniforms: np.ndarray, mean: float) -> np.ndarray:
+    """Map uniforms to Poisson(mean) counts through the inverse CDF.
+
+    Each count consumes exactly one uniform, so runs that share a seed but
+    differ in `mean` stay paired day by day (common random numbers).
+    """
+    if mean <= 0:
+        return np.zeros(len(uniforms), dtype=np.int64)
+    k = np.arange(int(mean + 10 * mean**0.5) + 10)
+    log_factorial = np.concatenate(([0.0], np.cumsum(np.log(k[1:]))))
+    cdf = np.cumsum(np.exp(k * np.log(mean) - mean - log_factorial))
+    return np.searchsorted(cdf, uniforms, side="right")
 
 
-@dataclass
+@dataclass(slots=True)
 class CartResult:
     cart_id: str
     shipment_id: str
@@ -26,7 +58,7 @@ class CartResult:
     chicks: int
 
 
-@dataclass
+@dataclass(slots=True)
 class BarnPlace:
     farm_name: str
     place_id: str
@@ -34,29 +66,43 @@ class BarnPlace:
     occupants: Dict[str, int] = field(default_factory=dict)
     occupied: int = 0
     cleaning_until: float = 0.0
+    _snapshot: Optional[Dict[str, int]] = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def remaining_capacity(self) -> int:
         return max(0, self.capacity - self.occupied)
 
+    def snapshot(self) -> Dict[str, int]:
+        """Copy of `occupants`, shared by every caller until the next mutation.
+
+        A placement's "after" snapshot is the next event's "before", so each
+        mutation costs one copy instead of two. Treat the result as read-only.
+        """
+        if self._snapshot is None:
+            self._snapshot = self.occupants.copy()
+        return self._snapshot
+
     def add(self, shipment_id: str, amount: int) -> None:
         self.occupants[shipment_id] = self.occupants.get(shipment_id, 0) + amount
         self.occupied += amount
+        self._snapshot = None
 
     def decrement(self, shipment_id: str, amount: int) -> int:
-        if shipment_id not in self.occupants:
+        current = self.occupants.get(shipment_id)
+        if current is None:
             return 0
-        current = self.occupants[shipment_id]
-        removal = min(current, amount)
-        if removal >= current:
-            self.occupants.pop(shipment_id, None)
-        else:
-            self.occupants[shipment_id] = current - removal
-        self.occupied = max(0, self.occupied - removal)
-        return removal
-
-
-@dataclass
+        self._snapshot = None
+        # `occupied` is the sum of `occupants`, so it cannot drop below zero here.
+        if amount >= current:
+            del self.occupants[shipment_id]
+            self.occupied -= current
+            return current
+        self.occupants[shipment_id] = current - amount
+        self.occupied -= amount
+        return amount
+
+
+@dataclass(slots=True)
 class SlaughterRecord:
     day: float
     shipment_id: str
@@ -78,57 +124,114 @@ class ChickSimulation:
     def __init__(self, cfg: SimulationConfig, logger: EventLogger) -> None:
         self.cfg = cfg
         self.logger = logger
+        # Checked once so disabled audit logging skips timestamp formatting.
+        self._audit = not isinstance(logger, NoOpEventLogger)
         self.env = simpy.Environment()
         self.capacity_plan: CapacityPlan = derive_capacity(cfg)
 
-        self.pre_hatch_slots = simpy.FilterStore(self.env, capacity=cfg.total_pre_hatch_slots)
-        self.hatch_slots = simpy.FilterStore(self.env, capacity=cfg.total_hatch_slots)
+        self.pre_hatch_slots = MachineSlotStore(self.env, capacity=cfg.total_pre_hatch_slots)
+        self.hatch_slots = MachineSlotStore(self.env, capacity=cfg.total_hatch_slots)
         self._populate_machine_slots()
 
-        self.truck_slots = simpy.Container(
-            self.env, capacity=cfg.active_trucks, init=cfg.active_trucks
-        )
+        self.truck_slots = CountingSlots(self.env, capacity=cfg.active_trucks)
 
         self.barn_places: List[BarnPlace] = self._initialise_barn_places(cfg.farm_specs)
-        self._barn_index: int = 0
+        # Live state index over barn_places (by list position) so placement
+        # ordering reads small sets instead of scanning every place.
+        self._place_index: Dict[str, int] = {p.place_id: i for i, p in enumerate(self.barn_places)}
+        self._empty_places: Set[int] = set()
+        self._partial_places: Set[int] = set()
+        self._places_by_shipment: DefaultDict[str, Set[int]] = defaultdict(set)
+        for idx in range(len(self.barn_places)):
+            self._reindex_place(idx)
         self.barn_lock = simpy.Resource(self.env, capacity=1)
+        # Fired (and replaced) whenever barn capacity frees up; trucks with no
+        # candidate place wait on it instead of polling.
+        self._barn_freed: simpy.events.Event = self.env.event()
 
         self.shipment_counter = itertools.count()
         self.parent_pairs = itertools.cycle(range(1, 16))
+        self._parent_pair_labels: Dict[int, str] = {i: f"parent-pair-{i}" for i in range(1, 16)}
         # Always-on cohesion: prefer keeping a shipment's carts on the same setter/hatcher machine
         self._preferred_setter: Dict[str, str] = {}
         self._preferred_hatcher: Dict[str, str] = {}
         # Coordination events to avoid race where multiple carts request slots before preference is set
         self._setter_pref_event: Dict[str, simpy.events.Event] = {}
         self._hatcher_pref_event: Dict[str, simpy.events.Event] = {}
-
-        self.slaughter_records: List[SlaughterRecord] = []
+        # Pool of (grow-out days, survival rate) pairs, refilled in batches from np_rng.
+        self._farm_draws: List[Tuple[float, float]] = []
+
+        # Slaughter output as parallel arrays (grown by doubling) so the
+        # summaries reduce with NumPy; `slaughter_records` rebuilds the rows.
+        self._slaughter_days = np.empty(1024, dtype=np.float64)
+        self._slaughter_quantities = np.empty(1024, dtype=np.int64)
+        self._slaughter_shipments: List[str] = []
+        self._slaughter_farms: List[str] = []
+        self._slaughter_len = 0
+        self._slaughter_total = 0
+        self._slaughter_total_after_warmup = 0
+        self._slaughter_after_warmup_count = 0
         self._timestamp_cache: Optional[str] = None
+        self._timestamp_cache_now: float = -1.0
         self.flow_writer = FlowWriter(self.cfg.flow_log_path)
 
     def _populate_machine_slots(self) -> None:
         """Pre‑allocate setter/hatcher slot identifiers into SimPy stores."""
         for machine in range(1, self.cfg.pre_hatch_machines + 1):
+            prefix = f"setter-{machine:02d}"
             for slot in range(1, self.cfg.pre_hatch_carts_per_machine + 1):
-                slot_id = f"setter-{machine:02d}-cart-{slot:02d}"
-                self.pre_hatch_slots.put(slot_id)  # type: ignore[arg-type]
+                self.pre_hatch_slots.put(SlotId(prefix, f"{prefix}-cart-{slot:02d}"))
         for machine in range(1, self.cfg.hatch_machines + 1):
+            prefix = f"hatcher-{machine:02d}"
             for slot in range(1, self.cfg.hatch_carts_per_machine + 1):
-                slot_id = f"hatcher-{machine:02d}-cart-{slot:02d}"
-                self.hatch_slots.put(slot_id)  # type: ignore[arg-type]
+                self.hatch_slots.put(SlotId(prefix, f"{prefix}-cart-{slot:02d}"))
 
     def _initialise_barn_places(self, specs: List[FarmSpec]) -> List[BarnPlace]:
         """Expand farm capacity into evenly split barn places with capacities."""
         places: List[BarnPlace] = []
         for spec in specs:
-            base = spec.capacity_chicks // spec.barns
-            extra = spec.capacity_chicks % spec.barns
+            base, extra = spec.capacity_per_barn
             for barn_idx in range(spec.barns):
                 capacity = base + (1 if barn_idx < extra else 0)
                 place_id = f"{spec.name}-barn-{barn_idx + 1:02d}"
                 places.append(BarnPlace(spec.name, place_id, capacity))
         return places
 
+    def _reindex_place(self, idx: int) -> None:
+        """Refresh the empty/partial membership of one place after a mutation."""
+        place = self.barn_places[idx]
+        self._empty_places.discard(idx)
+        self._partial_places.discard(idx)
+        if place.remaining_capacity > 0:
+            if place.occupied == 0:
+                self._empty_places.add(idx)
+            else:
+                self._partial_places.add(idx)
+
+    def _place_add(self, place: BarnPlace, shipment_id: str, amount: int) -> None:
+        place.add(shipment_id, amount)
+        idx = self._place_index[place.place_id]
+        self._places_by_shipment[shipment_id].add(idx)
+        self._reindex_place(idx)
+
+    def _place_decrement(self, place: BarnPlace, shipment_id: str, amount: int) -> int:
+        removed = place.decrement(shipment_id, amount)
+        idx = self._place_index[place.place_id]
+        if shipment_id not in place.occupants:
+            held = self._places_by_shipment.get(shipment_id)
+            if held is not None:
+                held.discard(idx)
+                if not held:
+                    del self._places_by_shipment[shipment_id]
+        self._reindex_place(idx)
+        if removed:
+            self._notify_barn_freed()
+        return removed
+
+    def _notify_barn_freed(self) -> None:
+        freed, self._barn_freed = self._barn_freed, self.env.event()
+        freed.succeed()
+
     def run(self) -> None:
         """Run the simulation until configured horizon and close flow log."""
         self.env.process(self._generate_shipments())
@@ -136,7 +239,12 @@ class ChickSimulation:
         self.flow_writer.close()
 
     def _current_timestamp(self) -> str:
-        return (self.cfg.start_date + timedelta(days=self.env.now)).isoformat()
+        # Many events fire at the same simulation instant; format once per instant.
+        now = self.env.now
+        if self._timestamp_cache_now != now:
+            self._timestamp_cache = (self.cfg.start_date + timedelta(days=now)).isoformat()
+            self._timestamp_cache_now = now
+        return self._timestamp_cache
 
     def _log(
         self,
@@ -146,6 +254,7 @@ class ChickSimulation:
         quantity: Optional[float],
         metadata: Optional[Dict[str, Any]] = None,
     ) -> None:
+        # Call sites check `self._audit` first so metadata dicts are only built when audited.
         self.logger.log(
             self.env.now,
             entity_id,
@@ -159,11 +268,14 @@ class ChickSimulation:
     def _generate_shipments(self):  # type: ignore[override]
         """Poisson process of shipments per day with cycling parent pairs."""
         mean_shipments = self.capacity_plan.shipments_per_day
-        while True:
-            shipments_today = max(1, np.random.poisson(mean_shipments))
+        # Draw the whole horizon's daily counts up front; `run` stops at the horizon.
+        uniforms = self.np_rng.random(self.cfg.simulation_days)
+        daily_counts = _poisson_inverse_cdf(uniforms, mean_shipments).clip(min=1)
+        for shipments_today in daily_counts.tolist():
             interval = 1.0 / shipments_today
             for _ in range(shipments_today):
-                shipment_id = f"shipment-{next(self.shipment_counter)}"
+                # Interned: the id is repeated in every flow row and dict key for this shipment.
+                shipment_id = sys.intern(f"shipment-{next(self.shipment_counter)}")
                 parent_pair_id = next(self.parent_pairs)
                 self.env.process(self._handle_shipment(shipment_id, parent_pair_id))
                 yield self.env.timeout(interval)
@@ -171,33 +283,53 @@ class ChickSimulation:
 
     def _handle_shipment(self, shipment_id: str, parent_pair_id: int):  # type: ignore[override]
         """Process one shipment through setter, hatcher, processing and trucks."""
-        eggs = self.cfg.shipment_eggs
-        farm_cars = math.ceil(eggs / self.cfg.farm_car_eggs)
-        self._log(
-            shipment_id,
-            "inventory",
-            "arrived",
-            eggs,
-            {
-                "parent_pair": f"parent-pair-{parent_pair_id}",
-                "farm_cars": farm_cars,
-            },
-        )
+        cfg = self.cfg
+        env = self.env
+        log_flow = self.flow_writer.log
+        timestamp = self._current_timestamp
+        eggs = cfg.shipment_eggs
+        farm_cars = -(-eggs // cfg.farm_car_eggs)
+        parent_pair = self._parent_pair_labels[parent_pair_id]
+        if self._audit:
+            self._log(
+                shipment_id,
+                "inventory",
+                "arrived",
+                eggs,
+                {
+                    "parent_pair": parent_pair,
+                    "farm_cars": farm_cars,
+                },
+            )
+
+        cart_size = cfg.pre_hatch_cart_eggs
+        full_carts, tail = divmod(eggs, cart_size)
+        cart_sizes = [cart_size] * full_carts + ([tail] if tail else [])
+        # Draw every cart's x-ray pass rate, hatch rate and hatch duration in one batch.
+        n_carts = len(cart_sizes)
+        np_rng = self.np_rng
+        cart_prefix = f"cart-{shipment_id}-"
+        pass_rates = np_rng.beta(cfg.xray_alpha, cfg.xray_beta, n_carts).tolist()
+        hatch_rates = np_rng.beta(cfg.hatch_alpha, cfg.hatch_beta, n_carts).tolist()
+        hatch_durations = np_rng.uniform(*cfg.hatch_days_range, n_carts).tolist()
+        cart_processes = [
+            env.process(
+                self._process_cart(
+                    shipment_id,
+                    cart_prefix + (_ID_SUFFIXES[cart_index] if cart_index < 100 else str(cart_index)),
+                    cart_eggs,
+                    pass_rates[cart_index - 1],
+                    hatch_rates[cart_index - 1],
+                    hatch_durations[cart_index - 1],
+                )
+            )
+            for cart_index, cart_eggs in enumerate(cart_sizes, start=1)
+        ]
 
-        cart_processes = []
-        remaining = eggs
-        cart_index = 0
-        while remaining > 0:
-            cart_index += 1
-            cart_eggs = min(self.cfg.pre_hatch_cart_eggs, remaining)
-            cart_id = f"cart-{shipment_id}-{cart_index:02d}"
-            proc = self.env.process(self._process_cart(shipment_id, cart_id, cart_eggs))
-            cart_processes.append(proc)
-            remaining -= cart_eggs
-
-        if cart_processes:
-            yield simpy.events.AllOf(self.env, cart_processes)
-        cart_results = [proc.value for proc in cart_processes]
+        cart_results: List[CartResult] = []
+        for proc in cart_processes:
+            yield proc
+            cart_results.append(proc.value)
 
         # Clear cohesion hints to avoid leaking preferences to future shipments
         self._preferred_setter.pop(shipment_id, None)
@@ -205,211 +337,228 @@ class ChickSimulation:
         self._preferred_hatcher.pop(shipment_id, None)
         self._hatcher_pref_event.pop(shipment_id, None)
 
-        total_discarded = sum(result.discarded for result in cart_results)
-        total_fertile = sum(result.fertile for result in cart_results)
-        total_chicks = sum(result.chicks for result in cart_results)
-        total_hatch_losses = sum(result.hatch_losses for result in cart_results)
+        total_discarded = total_fertile = total_chicks = total_hatch_losses = 0
+        for result in cart_results:
+            total_discarded += result.discarded
+            total_fertile += result.fertile
+            total_chicks += result.chicks
+            total_hatch_losses += result.hatch_losses
 
         # Write the parent_pair into the flow log so downstream analysis doesn't need SQLite
-        self.flow_writer.log(
+        event_ts = timestamp()
+        log_flow(
             shipment_id,
             resource_id="inventory",
             resource_type="inventory",
-            from_state={"status": "arrived"},
+            from_state=_STATUS_ARRIVED,
             to_state={"status": "to_pre_hatch", "carts": len(cart_results)},
-            event_ts=self._current_timestamp(),
+            event_ts=event_ts,
             quantity=eggs,
-            metadata={"parent_pair": f"parent-pair-{parent_pair_id}"},
+            metadata={"parent_pair": parent_pair},
         )
-        self.flow_writer.log(
+        log_flow(
             shipment_id,
             resource_id="xray",
             resource_type="process",
-            from_state={"status": "before"},
-            to_state={"status": "discarded"},
-            event_ts=self._current_timestamp(),
+            from_state=_STATUS_BEFORE,
+            to_state=_STATUS_DISCARDED,
+            event_ts=event_ts,
             quantity=total_discarded,
         )
-        self.flow_writer.log(
+        log_flow(
             shipment_id,
             resource_id="hatch_room",
             resource_type="process",
             from_state={"fertile": total_fertile + total_discarded},
             to_state={"fertile": total_fertile},
-            event_ts=self._current_timestamp(),
+            event_ts=event_ts,
             quantity=total_fertile,
         )
-        self.flow_writer.log(
+        log_flow(
             shipment_id,
             resource_id="hatch_room",
             resource_type="process",
             from_state={"fertile": total_fertile},
             to_state={"chicks": total_chicks, "losses": total_hatch_losses},
-            event_ts=self._current_timestamp(),
+            event_ts=event_ts,
             quantity=total_chicks,
         )
 
         if total_chicks <= 0:
-            self.flow_writer.log(
+            log_flow(
                 shipment_id,
                 resource_id="hatch_room",
                 resource_type="process",
-                from_state={"status": "empty"},
+                from_state=_STATUS_EMPTY,
                 to_state=None,
-                event_ts=self._current_timestamp(),
+                event_ts=event_ts,
                 quantity=0,
             )
             return
 
-        yield self.env.timeout(self.cfg.sort_and_vaccinate_hours / 24)
-        self.flow_writer.log(
+        yield env.timeout(cfg.sort_and_vaccinate_days)
+        log_flow(
             shipment_id,
             resource_id="processing",
             resource_type="process",
-            from_state={"status": "pre_processing"},
-            to_state={"status": "processed"},
-            event_ts=self._current_timestamp(),
+            from_state=_STATUS_PRE_PROC,
+            to_state=_STATUS_PROCESSED,
+            event_ts=timestamp(),
             quantity=total_chicks,
         )
 
-        yield self.env.timeout(self.cfg.load_to_transport_hours / 24)
-        trucks_needed = max(1, math.ceil(total_chicks / self.cfg.chicks_per_truck))
-        self.flow_writer.log(
+        yield env.timeout(cfg.load_to_transport_days)
+        trucks_needed = max(1, -(-total_chicks // cfg.chicks_per_truck))
+        log_flow(
             shipment_id,
             resource_id="transport_loading",
             resource_type="logistics",
-            from_state={"status": "scheduled"},
+            from_state=_STATUS_SCHEDULED,
             to_state={"trucks": trucks_needed},
-            event_ts=self._current_timestamp(),
+            event_ts=timestamp(),
             quantity=total_chicks,
         )
 
         remaining_chicks = total_chicks
         truck_counter = 0
+        truck_prefix = f"{shipment_id}-truck-"
+        truck_slots = self.truck_slots
         while remaining_chicks > 0:
             truck_counter += 1
-            load = min(self.cfg.chicks_per_truck, remaining_chicks)
+            load = min(cfg.chicks_per_truck, remaining_chicks)
             remaining_chicks -= load
-            yield self.truck_slots.get(1)
-            truck_id = f"{shipment_id}-truck-{truck_counter:02d}"
-            self.flow_writer.log(
+            if not truck_slots.try_acquire():
+                yield truck_slots.wait()
+            truck_id = truck_prefix + (
+                _ID_SUFFIXES[truck_counter] if truck_counter < 100 else str(truck_counter)
+            )
+            log_flow(
                 shipment_id,
                 resource_id=truck_id,
                 resource_type="truck",
-                from_state={"status": "loading"},
-                to_state={"status": "in_transit"},
-                event_ts=self._current_timestamp(),
+                from_state=_STATUS_LOADING,
+                to_state=_STATUS_IN_TRANSIT,
+                event_ts=timestamp(),
                 quantity=load,
             )
-            yield self.env.timeout(self.cfg.transport_time_days)
-            self.flow_writer.log(
+            yield env.timeout(cfg.transport_time_days)
+            log_flow(
                 shipment_id,
                 resource_id=truck_id,
                 resource_type="truck",
-                from_state={"status": "in_transit"},
-                to_state={"status": "arrived"},
-                event_ts=self._current_timestamp(),
+                from_state=_STATUS_IN_TRANSIT,
+                to_state=_STATUS_ARRIVED,
+                event_ts=timestamp(),
                 quantity=load,
             )
             yield from self._place_truck(shipment_id, truck_id, load)
-            self.truck_slots.put(1)
+            truck_slots.release()
 
     def _process_cart(
-        self, shipment_id: str, cart_id: str, eggs: int
+        self,
+        shipment_id: str,
+        cart_id: str,
+        eggs: int,
+        pass_rate: float,
+        hatch_rate: float,
+        hatch_duration: float,
     ) -> simpy.events.Event:
-        """Run one cart through setter and hatcher, logging flow transitions."""
+        """Run one cart through setter and hatcher, logging flow transitions.
+
+        The random draws are made per shipment in `_handle_shipment` and passed in.
+        """
+        env = self.env
+        log_flow = self.flow_writer.log
+        timestamp = self._current_timestamp
         # Enforce setter cohesion: first cart chooses machine, others wait for that choice
         if shipment_id not in self._setter_pref_event:
-            self._setter_pref_event[shipment_id] = self.env.event()
+            self._setter_pref_event[shipment_id] = env.event()
         setter_event = self._setter_pref_event[shipment_id]
         pref_setter = self._preferred_setter.get(shipment_id)
         if pref_setter is None:
             # Mark selection in progress so followers wait until event fires
             self._preferred_setter[shipment_id] = "__selecting__"
             slot_id = yield self.pre_hatch_slots.get()
-            chosen_prefix = str(slot_id).split('-cart')[0]
+            chosen_prefix = slot_id.machine
             self._preferred_setter[shipment_id] = chosen_prefix
             if not setter_event.triggered:
                 setter_event.succeed(chosen_prefix)
         elif pref_setter == "__selecting__":
             chosen_prefix = yield setter_event
-            slot_id = yield self.pre_hatch_slots.get(lambda s: str(s).startswith(chosen_prefix))  # type: ignore[arg-type]
+            slot_id = yield self.pre_hatch_slots.get(chosen_prefix)
         else:
             if not setter_event.triggered:
                 chosen_prefix = yield setter_event
             else:
                 chosen_prefix = pref_setter
-            slot_id = yield self.pre_hatch_slots.get(lambda s: str(s).startswith(chosen_prefix))  # type: ignore[arg-type]
-        self.flow_writer.log(
+            slot_id = yield self.pre_hatch_slots.get(chosen_prefix)
+        log_flow(
             shipment_id,
-            resource_id=slot_id,
+            resource_id=slot_id.full,
             resource_type="setter_slot",
-            from_state={"status": "empty"},
+            from_state=_STATUS_EMPTY,
             to_state={"cart_id": cart_id, "eggs": eggs},
-            event_ts=self._current_timestamp(),
+            event_ts=timestamp(),
             quantity=eggs,
         )
-        yield self.env.timeout(self.cfg.pre_hatch_days)
+        yield env.timeout(self.cfg.pre_hatch_days)
         yield self.pre_hatch_slots.put(slot_id)
-        self.flow_writer.log(
+        log_flow(
             shipment_id,
-            resource_id=slot_id,
+            resource_id=slot_id.full,
             resource_type="setter_slot",
             from_state={"cart_id": cart_id, "eggs": eggs},
-            to_state={"status": "released"},
-            event_ts=self._current_timestamp(),
+            to_state=_STATUS_RELEASED,
+            event_ts=timestamp(),
             quantity=eggs,
         )
 
-        pass_rate = self.rng.betavariate(self.cfg.xray_alpha, self.cfg.xray_beta)
         fertile = int(round(eggs * pass_rate))
         discarded = eggs - fertile
 
         # Enforce hatcher cohesion: wait for chosen machine if not yet decided
         if shipment_id not in self._hatcher_pref_event:
-            self._hatcher_pref_event[shipment_id] = self.env.event()
+            self._hatcher_pref_event[shipment_id] = env.event()
         hatcher_event = self._hatcher_pref_event[shipment_id]
         pref_hatcher = self._preferred_hatcher.get(shipment_id)
         if pref_hatcher is None:
             self._preferred_hatcher[shipment_id] = "__selecting__"
             hatch_slot_id = yield self.hatch_slots.get()
-            chosen_hatcher = str(hatch_slot_id).split('-cart')[0]
+            chosen_hatcher = hatch_slot_id.machine
             self._preferred_hatcher[shipment_id] = chosen_hatcher
             if not hatcher_event.triggered:
                 hatcher_event.succeed(chosen_hatcher)
         elif pref_hatcher == "__selecting__":
             chosen_hatcher = yield hatcher_event
-            hatch_slot_id = yield self.hatch_slots.get(lambda s: str(s).startswith(chosen_hatcher))  # type: ignore[arg-type]
+            hatch_slot_id = yield self.hatch_slots.get(chosen_hatcher)
         else:
             if not hatcher_event.triggered:
                 chosen_hatcher = yield hatcher_event
             else:
                 chosen_hatcher = pref_hatcher
-            hatch_slot_id = yield self.hatch_slots.get(lambda s: str(s).startswith(chosen_hatcher))  # type: ignore[arg-type]
-        self.flow_writer.log(
+            hatch_slot_id = yield self.hatch_slots.get(chosen_hatcher)
+        log_flow(
             shipment_id,
-            resource_id=hatch_slot_id,
+            resource_id=hatch_slot_id.full,
             resource_type="hatcher_slot",
-            from_state={"status": "empty"},
+            from_state=_STATUS_EMPTY,
             to_state={"cart_id": cart_id, "fertile": fertile},
-            event_ts=self._current_timestamp(),
+            event_ts=timestamp(),
             quantity=fertile,
         )
-        hatch_duration = self.rng.uniform(*self.cfg.hatch_days_range)
-        yield self.env.timeout(hatch_duration)
+        yield env.timeout(hatch_duration)
 
-        hatch_rate = self.rng.betavariate(self.cfg.hatch_alpha, self.cfg.hatch_beta)
         chicks = int(round(fertile * hatch_rate))
         hatch_losses = fertile - chicks
 
         yield self.hatch_slots.put(hatch_slot_id)
-        self.flow_writer.log(
+        log_flow(
             shipment_id,
-            resource_id=hatch_slot_id,
+            resource_id=hatch_slot_id.full,
             resource_type="hatcher_slot",
             from_state={"cart_id": cart_id, "fertile": fertile},
             to_state={"chicks": chicks, "losses": hatch_losses},
-            event_ts=self._current_timestamp(),
+            event_ts=timestamp(),
             quantity=chicks,
         )
 
@@ -424,55 +573,53 @@ class ChickSimulation:
         )
 
     def _place_truck(self, shipment_id: str, truck_id: str, load: int):
-        """Atomically place a truck's load: one barn log per affected place.
+        """Place a truck's load: one barn log per affected place and lock hold.
 
         This avoids producing multiple incremental barn state changes per truck,
         which previously led to small +/- corrections in timeline diffs.
         """
-        # Build a cohesive placement plan: prefer empty places, then places already
-        # containing this shipment, then mix with others only if necessary.
-        plan: list[tuple[str, int]] = []
-        remaining = load
-        def recompute_order() -> list[str]:
-            empty = [p.place_id for p in self.barn_places if self.env.now >= p.cleaning_until and p.occupied == 0 and p.remaining_capacity > 0]
-            own = [p.place_id for p in self.barn_places if self.env.now >= p.cleaning_until and shipment_id in p.occupants and p.remaining_capacity > 0]
-            other = [p.place_id for p in self.barn_places if self.env.now >= p.cleaning_until and p.occupied > 0 and shipment_id not in p.occupants and p.remaining_capacity > 0]
-            return empty + own + other
-
-        ordered_ids = recompute_order()
-        idx = 0
-        while remaining > 0:
-            if idx >= len(ordered_ids):
-                # wait for capacity to free up or cleaning to complete
-                yield self.env.timeout(0.5)
-                ordered_ids = recompute_order()
-                idx = 0
-                if not ordered_ids:
-                    continue
-            candidate_id = ordered_ids[idx]
-            idx += 1
-            with self.barn_lock.request() as req:
-                yield req
-                confirmed = self._find_specific_place(candidate_id)
-                if confirmed is None or confirmed.remaining_capacity <= 0:
-                    continue
-                portion = min(confirmed.remaining_capacity, remaining)
-                if portion <= 0:
-                    continue
-                plan.append((confirmed.place_id, portion))
-                remaining -= portion
-
-        # Apply the plan: mutate places and write a single event per place
-        for place_id, amount in plan:
-            with self.barn_lock.request() as req:
+        env = self.env
+        barn_lock = self.barn_lock
+
+        def recompute_order() -> list[BarnPlace]:
+            # Only indexed places (spare capacity, not being cleaned) are returned,
+            # so candidates need no re-lookup or re-check under the lock.
+            now = env.now
+            places = self.barn_places
+            own_idx = self._places_by_shipment.get(shipment_id, set()) & self._partial_places
+            return [
+                places[i]
+                for group in (self._empty_places, own_idx, self._partial_places - own_idx)
+                for i in sorted(group)
+                if now >= places[i].cleaning_until
+            ]
+
+        # Place whatever fits under one lock hold, so each portion is planned
+        # against the same barn state it is applied to. Any remainder waits,
+        # with the lock released, until barn capacity frees up.
+        while True:
+            with barn_lock.request() as req:
                 yield req
-                confirmed_place = self._find_specific_place(place_id)
-                if confirmed_place is None:
-                    continue
-                before_mix = confirmed_place.occupants.copy()
-                confirmed_place.add(shipment_id, amount)
-                after_mix = confirmed_place.occupants.copy()
-            # Log concise intake event
+                # Prefer empty places, then places already containing this
+                # shipment, then mix with others only if necessary.
+                for confirmed in recompute_order():
+                    amount = min(confirmed.remaining_capacity, load)
+                    self._apply_truck_portion(shipment_id, truck_id, confirmed, amount)
+                    load -= amount
+                    if load == 0:
+                        return
+            yield self._barn_freed
+
+    def _apply_truck_portion(
+        self, shipment_id: str, truck_id: str, confirmed_place: BarnPlace, amount: int
+    ) -> None:
+        """Mutate one planned place, write a single event for it and start its farm cycle."""
+        place_id = confirmed_place.place_id
+        before_mix = confirmed_place.snapshot()
+        self._place_add(confirmed_place, shipment_id, amount)
+        after_mix = confirmed_place.snapshot()
+        # Log concise intake event
+        if self._audit:
             self._log(
                 shipment_id,
                 "farm_intake",
@@ -485,132 +632,148 @@ class ChickSimulation:
                     "remaining_capacity": confirmed_place.remaining_capacity,
                 },
             )
-            # Maintain compatibility: still write barn state snapshot, but once
-            self.flow_writer.log(
-                shipment_id,
-                resource_id=place_id,
-                resource_type="barn",
-                from_state=before_mix,
-                to_state=after_mix,
-                event_ts=self._current_timestamp(),
-                quantity=amount,
-                metadata={"farm": confirmed_place.farm_name, "truck_id": truck_id},
-            )
-
-    def _find_next_place(self) -> Optional[BarnPlace]:
-        total_places = len(self.barn_places)
-        for offset in range(total_places):
-            idx = (self._barn_index + offset) % total_places
-            place = self.barn_places[idx]
-            if self.env.now < place.cleaning_until:
-                continue
-            if place.remaining_capacity > 0:
-                self._barn_index = (idx + 1) % total_places
-                return place
-        return None
-
-    def _find_specific_place(self, place_id: str) -> Optional[BarnPlace]:
-        for place in self.barn_places:
-            if place.place_id == place_id and self.env.now >= place.cleaning_until:
-                return place
-        return None
+        # Maintain compatibility: still write barn state snapshot, but once
+        self.flow_writer.log(
+            shipment_id,
+            resource_id=place_id,
+            resource_type="barn",
+            from_state=before_mix,
+            to_state=after_mix,
+            event_ts=self._current_timestamp(),
+            quantity=amount,
+            metadata={"farm": confirmed_place.farm_name, "truck_id": truck_id},
+        )
+        # Grow the portion out; slaughter and cleaning free the place again.
+        self.env.process(self._manage_farm_cycle(shipment_id, amount, confirmed_place))
+
+    def _next_farm_draw(self) -> Tuple[float, float]:
+        if not self._farm_draws:
+            cfg = self.cfg
+            np_rng = self.np_rng
+            grow_out = np_rng.uniform(*cfg.grow_out_days_range, _FARM_DRAW_BATCH).tolist()
+            survival = np_rng.beta(cfg.farm_alpha, cfg.farm_beta, _FARM_DRAW_BATCH).tolist()
+            self._farm_draws = list(zip(grow_out, survival))
+        return self._farm_draws.pop()
 
     def _manage_farm_cycle(self, shipment_id: str, amount: int, place: BarnPlace):
-        grow_out_time = self.rng.uniform(*self.cfg.grow_out_days_range)
-        yield self.env.timeout(grow_out_time)
-        survival_rate = self.rng.betavariate(self.cfg.farm_alpha, self.cfg.farm_beta)
+        env = self.env
+        place_id = place.place_id
+        farm = place.farm_name
+        grow_out_time, survival_rate = self._next_farm_draw()
+        yield env.timeout(grow_out_time)
         survivors = int(round(amount * survival_rate))
         losses = amount - survivors
-        self._log(
-            shipment_id,
-            "grow_out",
-            "completed",
-            survivors,
-            {
-                "losses": losses,
-                "place_id": place.place_id,
-                "farm": place.farm_name,
-            },
-        )
-        self._log(
-            shipment_id,
-            "slaughter",
-            "shipped",
-            survivors,
-            {"place_id": place.place_id, "farm": place.farm_name},
-        )
-        self.slaughter_records.append(
-            SlaughterRecord(
-                day=self.env.now,
-                shipment_id=shipment_id,
-                quantity=survivors,
-                farm=place.farm_name,
+        if self._audit:
+            self._log(
+                shipment_id,
+                "grow_out",
+                "completed",
+                survivors,
+                {
+                    "losses": losses,
+                    "place_id": place_id,
+                    "farm": farm,
+                },
             )
-        )
+            self._log(
+                shipment_id,
+                "slaughter",
+                "shipped",
+                survivors,
+                {"place_id": place_id, "farm": farm},
+            )
+        self._record_slaughter(shipment_id, survivors, farm)
 
-        before_mix = place.occupants.copy()
-        removed = place.decrement(shipment_id, amount)
-        after_mix = place.occupants.copy()
+        before_mix = place.snapshot()
+        removed = self._place_decrement(place, shipment_id, amount)
+        after_mix = place.snapshot()
         self.flow_writer.log(
             shipment_id,
-            resource_id=place.place_id,
+            resource_id=place_id,
             resource_type="barn",
             from_state=before_mix,
             to_state=after_mix,
             event_ts=self._current_timestamp(),
             quantity=removed,
-            metadata={"farm": place.farm_name, "status": "removal"},
+            metadata={"farm": farm, "status": "removal"},
         )
         if place.occupied == 0:
-            place.cleaning_until = self.env.now + self.cfg.cleaning_days
-            self._log(
-                shipment_id,
-                "farm_place",
-                "available",
-                removed,
-                {
-                    "place_id": place.place_id,
-                    "farm": place.farm_name,
-                    "removed_shipment": shipment_id,
-                    "removed_amount": removed,
-                },
-            )
-            yield self.env.timeout(self.cfg.cleaning_days)
+            cleaning_days = self.cfg.cleaning_days
+            place.cleaning_until = env.now + cleaning_days
+            if self._audit:
+                self._log(
+                    shipment_id,
+                    "farm_place",
+                    "available",
+                    removed,
+                    {
+                        "place_id": place_id,
+                        "farm": farm,
+                        "removed_shipment": shipment_id,
+                        "removed_amount": removed,
+                    },
+                )
+            yield env.timeout(cleaning_days)
             place.cleaning_until = 0.0
-        else:
+            self._notify_barn_freed()
+        elif self._audit:
             self._log(
                 shipment_id,
                 "farm_place",
                 "partial_release",
                 removed,
                 {
-                    "place_id": place.place_id,
-                    "farm": place.farm_name,
+                    "place_id": place_id,
+                    "farm": farm,
                     "remaining_capacity": place.remaining_capacity,
-                    "mix": place.occupants.copy(),
+                    "mix": place.snapshot(),
                     "removed_shipment": shipment_id,
                     "removed_amount": removed,
                 },
             )
 
+    def _record_slaughter(self, shipment_id: str, quantity: int, farm: str) -> None:
+        n = self._slaughter_len
+        if n == len(self._slaughter_days):
+            self._slaughter_days = np.resize(self._slaughter_days, 2 * n)
+            self._slaughter_quantities = np.resize(self._slaughter_quantities, 2 * n)
+        now = self.env.now
+        self._slaughter_days[n] = now
+        self._slaughter_quantities[n] = quantity
+        self._slaughter_shipments.append(shipment_id)
+        self._slaughter_farms.append(farm)
+        self._slaughter_len = n + 1
+        self._slaughter_total += quantity
+        if now >= self.cfg.warmup_days:
+            self._slaughter_total_after_warmup += quantity
+            self._slaughter_after_warmup_count += 1
+
     @property
-    def slaughtered_after_warmup(self) -> List[int]:
-        cutoff = self.cfg.warmup_days
+    def slaughter_records(self) -> List[SlaughterRecord]:
+        n = self._slaughter_len
         return [
-            record.quantity
-            for record in self.slaughter_records
-            if record.day >= cutoff
+            SlaughterRecord(day=day, shipment_id=shipment_id, quantity=quantity, farm=farm)
+            for day, shipment_id, quantity, farm in zip(
+                self._slaughter_days[:n].tolist(),
+                self._slaughter_shipments,
+                self._slaughter_quantities[:n].tolist(),
+                self._slaughter_farms,
+            )
         ]
 
+    @property
+    def slaughtered_after_warmup(self) -> List[int]:
+        n = self._slaughter_len
+        mask = self._slaughter_days[:n] >= self.cfg.warmup_days
+        return self._slaughter_quantities[:n][mask].tolist()
+
     def summarize(self) -> Dict[str, Optional[float]]:
-        harvested = self.slaughtered_after_warmup
-        if not harvested:
-            total = sum(record.quantity for record in self.slaughter_records)
+        # Totals are kept up to date by `_record_slaughter`.
+        total = self._slaughter_total
+        if not self._slaughter_after_warmup_count:
             return {"avg_slaughter_per_day": None, "total_slaughtered": total}
-        total_output = sum(harvested)
         days_tracked = max(1, self.cfg.simulation_days - self.cfg.warmup_days)
-        avg_per_day = total_output / days_tracked
-        total = sum(record.quantity for record in self.slaughter_records)
+        avg_per_day = self._slaughter_total_after_warmup / days_tracked
         return {"avg_slaughter_per_day": avg_per_day, "total_slaughtered": total}
 
     @property
@@ -618,3 +781,10 @@ class ChickSimulation:
         if not hasattr(self, "_rng"):
             self._rng = random.Random()
         return self._rng
+
+    @property
+    def np_rng(self) -> np.random.Generator:
+        # Seeded from `rng` so seeding `_rng` also makes the batched draws reproducible.
+        if not hasattr(self, "_np_rng"):
+            self._np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        return self._np_rng
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import itertools
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+import simpy
+from simpy.core import BoundClass
+from simpy.resources import base
+from simpy.resources.store import StorePut
+
+
+@dataclass(frozen=True, slots=True)
+class SlotId:
+    """A machine slot: `machine` is the cohesion key, `full` the logged id."""
+
+    machine: str
+    full: str
+
+    def __str__(self) -> str:
+        return self.full
+
+
+class MachineSlotGet(base.Get):
+    """Request a free slot, optionally restricted to one machine."""
+
+    def __init__(self, store: "MachineSlotStore", machine: Optional[str] = None) -> None:
+        self.machine = machine
+        super().__init__(store)
+
+
+class _KeyedGetQueue:
+    """Pending gets bucketed by requested machine (`None` = any), in arrival order."""
+
+    def __init__(self) -> None:
+        self.by_machine: Dict[Optional[str], Deque[MachineSlotGet]] = {}
+        self._seq = itertools.count()
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, event: MachineSlotGet) -> None:
+        event.seq = next(self._seq)
+        self.by_machine.setdefault(event.machine, deque()).append(event)
+        self._len += 1
+
+    def remove(self, event: MachineSlotGet) -> None:
+        bucket = self.by_machine[event.machine]
+        bucket.remove(event)
+        self._drop_if_empty(event.machine, bucket)
+
+    def popleft(self, machine: Optional[str]) -> MachineSlotGet:
+        bucket = self.by_machine[machine]
+        event = bucket.popleft()
+        self._drop_if_empty(machine, bucket)
+        return event
+
+    def _drop_if_empty(self, machine: Optional[str], bucket: Deque[MachineSlotGet]) -> None:
+        self._len -= 1
+        if not bucket:
+            del self.by_machine[machine]
+
+
+class MachineSlotStore(base.BaseResource):
+    """Pool of `SlotId`s with O(1) per-machine gets.
+
+    Behaves like a `simpy.FilterStore` whose only filters are "any slot" and
+    "a slot on machine M": free slots are kept per machine and in one global
+    put order, so `get()` still returns the longest-free slot overall and
+    `get(machine)` pops that machine's longest-free slot without scanning
+    every stored item.
+
+    Pending gets are bucketed by machine too. A trigger serves, in arrival
+    order, only the requests whose machine has a free slot, rather than
+    re-testing every waiting request as `FilterStore` does.
+    """
+
+    GetQueue = _KeyedGetQueue
+
+    def __init__(self, env: simpy.Environment, capacity: int) -> None:
+        super().__init__(env, capacity)
+        self._free: Dict[str, Deque[SlotId]] = {}
+        self._order: "OrderedDict[str, SlotId]" = OrderedDict()  # keyed by full id
+
+    put = BoundClass(StorePut)
+    get = BoundClass(MachineSlotGet)
+
+    def _do_put(self, event: StorePut) -> Optional[bool]:
+        if len(self._order) < self._capacity:
+            slot = event.item
+            self._free.setdefault(slot.machine, deque()).append(slot)
+            self._order[slot.full] = slot
+            event.succeed()
+        return None
+
+    def _do_get(self, event: MachineSlotGet) -> Optional[bool]:  # type: ignore[override]
+        if event.machine is None:
+            if self._order:
+                _, slot = self._order.popitem(last=False)
+                self._free[slot.machine].popleft()
+                event.succeed(slot)
+        else:
+            free = self._free.get(event.machine)
+            if free:
+                slot = free.popleft()
+                del self._order[slot.full]
+                event.succeed(slot)
+        return True
+
+    def _trigger_get(self, put_event: Optional[StorePut]) -> None:
+        # Equivalent to FilterStore's in-order scan: the earliest request that
+        # can be served is always the head of its bucket, and serving it can
+        # only shrink what later requests could take.
+        waiting = self.get_queue.by_machine
+        free = self._free
+        while waiting and self._order:
+            best: Optional[MachineSlotGet] = None
+            for machine, bucket in waiting.items():
+                head = bucket[0]
+                if machine is not None and not free.get(machine):
+                    continue
+                if best is None or head.seq < best.seq:
+                    best = head
+            if best is None:
+                return
+            self.get_queue.popleft(best.machine)
+            self._do_get(best)
+
+
+class CountingSlots:
+    """Counting pool of interchangeable slots with a synchronous fast path.
+
+    While a slot is free, `try_acquire()` takes it without creating or
+    scheduling a SimPy event. Only when the pool is empty does a caller
+    `yield wait()`; `release()` hands the slot straight to the oldest waiter.
+    """
+
+    def __init__(self, env: simpy.Environment, capacity: int) -> None:
+        self._env = env
+        self.capacity = capacity
+        self.level = capacity
+        self._waiters: Deque[simpy.Event] = deque()
+
+    def try_acquire(self) -> bool:
+        if self.level:
+            self.level -= 1
+            return True
+        return False
+
+    def wait(self) -> simpy.Event:
+        event = self._env.event()
+        self._waiters.append(event)
+        return event
+
+    def release(self) -> None:
+        if self._waiters:
+            self._waiters.popleft().succeed()
+        else:
+            self.level += 1
@@ -0,0 +1,17 @@
+from simulation.config import SimulationConfig, derive_capacity
+
+
+def test_derive_capacity_is_memoized():
+    assert derive_capacity(SimulationConfig()) is derive_capacity(SimulationConfig())
+
+
+def test_derive_capacity_differs_per_config():
+    base = derive_capacity(SimulationConfig())
+    other = derive_capacity(SimulationConfig(target_slaughter_per_day=150_000))
+    assert other is not base
+    assert other.shipments_per_day < base.shipments_per_day
+
+
+def test_list_ranges_still_hit_the_cache():
+    cfg = SimulationConfig(hatch_days_range=[3, 5], grow_out_days_range=[35, 42])
+    assert derive_capacity(cfg) is derive_capacity(SimulationConfig())
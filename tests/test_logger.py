@@ -0,0 +1,210 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from simulation import logger as logger_module
+from simulation.logger import EventLogger
+
+
+def _legacy_db(path, version, sim_day_type, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        f"""
+        CREATE TABLE events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sim_day {sim_day_type} NOT NULL,
+            real_ts TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            status TEXT NOT NULL,
+            quantity REAL,
+            metadata TEXT
+        )
+        """
+    )
+    conn.executemany(
+        "INSERT INTO events (sim_day, real_ts, entity_id, stage, status, quantity, metadata) "
+        "VALUES (?, '', ?, ?, ?, ?, '{}')",
+        rows,
+    )
+    conn.execute(f"PRAGMA user_version={version}")
+    conn.commit()
+    conn.close()
+
+
+def test_batched_events_round_trip_through_view(tmp_path):
+    db_path = tmp_path / "events.sqlite"
+    stages = [("incubation", "started"), ("hatch", "completed"), ("slaughter", "shipped")]
+    total = 2500
+
+    logger = EventLogger(str(db_path))
+    assert total > logger._batch_size
+    for i in range(total):
+        stage, status = stages[i % len(stages)]
+        logger.log(i / 100, f"shipment-{i % 7}", stage, status, quantity=i, metadata={"n": i})
+    logger.close()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == total
+        pairs = conn.execute("SELECT DISTINCT stage, status FROM events").fetchall()
+        assert sorted(pairs) == sorted(stages)
+        day, stage, status = conn.execute(
+            "SELECT sim_day, stage, status FROM events WHERE quantity = 1234"
+        ).fetchone()
+        assert (day, stage, status) == (12.34, "hatch", "completed")
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize(
+    "version, sim_day_type, scale",
+    [(0, "REAL", 1), (2, "INTEGER", EventLogger.TICKS_PER_DAY)],
+)
+def test_legacy_events_table_is_migrated(tmp_path, version, sim_day_type, scale):
+    db_path = tmp_path / "legacy.sqlite"
+    _legacy_db(
+        db_path,
+        version,
+        sim_day_type,
+        [
+            (2.5 * scale, "shipment-0", "inventory", "received", 70_000),
+            (40.25 * scale, "shipment-0", "slaughter", "shipped", 52_000),
+        ],
+    )
+
+    logger = EventLogger(str(db_path))
+    logger.log(41.0, "shipment-1", "slaughter", "shipped", 1)
+    logger.close()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == EventLogger._SCHEMA_VERSION
+        assert conn.execute(
+            "SELECT type FROM sqlite_master WHERE name = 'events'"
+        ).fetchone()[0] == "view"
+        rows = conn.execute(
+            "SELECT id, sim_day, entity_id, stage, status, quantity FROM events ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+    assert rows == [
+        (1, 2.5, "shipment-0", "inventory", "received", 70_000.0),
+        (2, 40.25, "shipment-0", "slaughter", "shipped", 52_000.0),
+        (3, 41.0, "shipment-1", "slaughter", "shipped", 1.0),
+    ]
+
+
+def test_jsonl_fallback_without_sqlite3(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_module, "sqlite3", None)
+    db_path = tmp_path / "events.sqlite"
+
+    logger = EventLogger(str(db_path))
+    assert logger.conn is None
+    logger.log(1.5, "shipment-0", "xray", "passed", 10, {"farm": "A"})
+    logger.log_many_dicts([
+        {"sim_day": 2.25, "entity_id": "shipment-1", "stage": "hatch", "status": "completed"},
+    ])
+    logger.close()
+
+    assert not db_path.exists()
+    lines = db_path.with_suffix(".jsonl").read_text(encoding="utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [(r["sim_day"], r["entity_id"], r["stage"], r["status"]) for r in records] == [
+        (1.5, "shipment-0", "xray", "passed"),
+        (2.25, "shipment-1", "hatch", "completed"),
+    ]
+    assert records[0]["metadata"] == {"farm": "A"}
+    assert records[1]["metadata"] == {}
+
+
+def _wait_for_writer_error(logger, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while logger._writer_error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert logger._writer_error is not None
+
+
+def test_failed_batch_surfaces_and_rolls_back(tmp_path):
+    db_path = tmp_path / "events.sqlite"
+    logger = EventLogger(str(db_path))
+    logger._batch_size = 5
+    for _ in range(5):
+        logger.log(1.0, None, "inventory", "received")  # entity_id is NOT NULL
+    _wait_for_writer_error(logger)
+
+    # The failed transaction was rolled back, so another writer can take the lock.
+    other = sqlite3.connect(db_path, timeout=0)
+    try:
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+        assert other.execute("SELECT COUNT(*) FROM stages").fetchone()[0] == 0
+    finally:
+        other.close()
+
+    with pytest.raises(sqlite3.IntegrityError):
+        for _ in range(5):
+            logger.log(2.0, "shipment-0", "inventory", "received")
+    with pytest.raises(sqlite3.IntegrityError):
+        logger.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        logger.conn.execute("SELECT 1")
+
+
+def test_context_manager_commits_queued_rows_when_run_raises(tmp_path):
+    db_path = tmp_path / "events.sqlite"
+    with pytest.raises(RuntimeError, match="run failed"):
+        with EventLogger(str(db_path)) as logger:
+            for i in range(2500):
+                logger.log(i / 100, "shipment-0", "inventory", "received")
+            raise RuntimeError("run failed")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 2500
+    finally:
+        conn.close()
+
+
+def test_numpy_quantities_are_stored_as_real(tmp_path):
+    np = pytest.importorskip("numpy")
+    db_path = tmp_path / "events.sqlite"
+    with EventLogger(str(db_path)) as logger:
+        logger.log(1.0, "shipment-0", "hatch", "completed", np.int64(3), {"losses": np.int64(2)})
+        logger.log_many_dicts([
+            {"sim_day": 2.0, "entity_id": "shipment-1", "stage": "hatch",
+             "status": "completed", "quantity": np.float32(4.5)},
+        ])
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT quantity, metadata FROM events ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    assert rows == [(3.0, '{"losses":2}'), (4.5, "{}")]
+
+
+def test_resolve_stage_and_status(tmp_path):
+    db_path = tmp_path / "events.sqlite"
+    with EventLogger(str(db_path)) as logger:
+        logger.log(1.0, "shipment-0", "xray", "passed")
+        logger.log(2.0, "shipment-0", "hatch", "completed")
+    conn = sqlite3.connect(db_path)
+    try:
+        stage_rows = conn.execute("SELECT id, name FROM stages").fetchall()
+        status_rows = conn.execute("SELECT id, name FROM statuses").fetchall()
+    finally:
+        conn.close()
+
+    reopened = EventLogger(str(db_path))
+    try:
+        for code, name in stage_rows:
+            assert logger.resolve_stage(code) == reopened.resolve_stage(code) == name
+        for code, name in status_rows:
+            assert logger.resolve_status(code) == reopened.resolve_status(code) == name
+        reopened.log(3.0, "shipment-1", "slaughter", "shipped")
+        assert reopened.resolve_stage(reopened._stages["slaughter"]) == "slaughter"
+    finally:
+        reopened.close()
@@ -0,0 +1,35 @@
+import random
+
+from simulation.config import SimulationConfig
+from simulation.logger import NO_OP_LOGGER
+from simulation.model import ChickSimulation
+
+
+def test_barns_never_exceed_capacity(tmp_path):
+    cfg = SimulationConfig(
+        simulation_days=120, warmup_days=15, flow_log_path=tmp_path / "flow.parquet"
+    )
+    sim = ChickSimulation(cfg, NO_OP_LOGGER)
+    sim._rng = random.Random(0)
+
+    capacity_per_barn = {
+        spec.name: spec.capacity_per_barn[0] + (1 if spec.capacity_per_barn[1] else 0)
+        for spec in cfg.farm_specs
+    }
+    overfilled = []
+    place_add = sim._place_add
+
+    def checked_place_add(place, shipment_id, amount):
+        place_add(place, shipment_id, amount)
+        if place.occupied > place.capacity:
+            overfilled.append((sim.env.now, place.place_id, place.occupied, place.capacity))
+
+    sim._place_add = checked_place_add
+    sim.run()
+
+    assert overfilled == []
+    for place in sim.barn_places:
+        assert place.occupied <= place.capacity <= capacity_per_barn[place.farm_name]
+    # Barns filled up during the run, so slaughter and cleaning freed capacity.
+    assert sim.summarize()["total_slaughtered"] > 0
+    assert sim.truck_slots.level > 0
@@ -0,0 +1,219 @@
+import random
+
+import pytest
+import simpy
+
+from simulation.slots import CountingSlots, MachineSlotStore, SlotId
+
+
+def _slot(machine, n):
+    return SlotId(machine, f"{machine}-cart-{n:02d}")
+
+
+def _store(env, slots, capacity=None):
+    store = MachineSlotStore(env, capacity=capacity or len(slots))
+    for slot in slots:
+        store.put(slot)
+    return store
+
+
+def test_keyed_get_takes_longest_free_slot_on_that_machine():
+    env = simpy.Environment()
+    store = _store(env, [_slot("a", 1), _slot("b", 1), _slot("a", 2)])
+
+    first = store.get("a")
+    second = store.get("a")
+    env.run()
+
+    assert (first.value, second.value) == (_slot("a", 1), _slot("a", 2))
+    assert store.get("b").triggered
+
+
+def test_any_get_takes_longest_free_slot_overall():
+    env = simpy.Environment()
+    store = _store(env, [_slot("b", 1), _slot("a", 1), _slot("b", 2)])
+
+    store.get("b")  # takes b-01, so the oldest remaining slot is a-01
+    got = store.get()
+    env.run()
+
+    assert got.value == _slot("a", 1)
+
+
+def test_waiters_for_same_machine_are_served_in_arrival_order():
+    env = simpy.Environment()
+    store = _store(env, [], capacity=4)
+    served = []
+
+    def waiter(name):
+        slot = yield store.get("a")
+        served.append((env.now, name, slot))
+
+    def feeder():
+        yield env.timeout(1)
+        yield store.put(_slot("b", 1))  # other machine: wakes nobody
+        yield env.timeout(1)
+        yield store.put(_slot("a", 1))
+        yield env.timeout(1)
+        yield store.put(_slot("a", 2))
+
+    for name in ("first", "second"):
+        env.process(waiter(name))
+    env.process(feeder())
+    env.run()
+
+    assert served == [(2, "first", _slot("a", 1)), (3, "second", _slot("a", 2))]
+
+
+def test_put_hands_slot_to_earliest_matching_waiter():
+    env = simpy.Environment()
+    store = _store(env, [], capacity=4)
+    keyed = store.get("b")
+    any_slot = store.get()
+    store.put(_slot("a", 1))
+    env.run()
+
+    assert any_slot.value == _slot("a", 1)
+    assert not keyed.triggered
+
+    store.put(_slot("b", 1))
+    env.run()
+    assert keyed.value == _slot("b", 1)
+
+
+def test_put_waits_while_store_is_full():
+    env = simpy.Environment()
+    store = _store(env, [_slot("a", 1)], capacity=1)
+    blocked = store.put(_slot("a", 2))
+    env.run()
+    assert not blocked.triggered
+
+    got = store.get("a")
+    env.run()
+    assert got.value == _slot("a", 1)
+    assert blocked.triggered
+    later = store.get("a")
+    env.run()
+    assert later.value == _slot("a", 2)
+
+
+def _run_workload(seed, make_store, request):
+    env = simpy.Environment()
+    machines = ["m0", "m1", "m2"]
+    store = make_store(env, capacity=len(machines) * 2)
+    for n in (1, 2):
+        for machine in machines:
+            store.put(_slot(machine, n))
+    rng = random.Random(seed)
+    trace = []
+
+    def worker(i, machine, arrive, hold):
+        yield env.timeout(arrive)
+        slot = yield request(store, machine)
+        trace.append((env.now, i, slot.full))
+        yield env.timeout(hold)
+        yield store.put(slot)
+
+    for i in range(60):
+        machine = rng.choice([None, *machines])
+        env.process(worker(i, machine, rng.randint(0, 20), rng.randint(1, 4)))
+    env.run()
+    return trace
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_matches_filter_store_on_seeded_workload(seed):
+    expected = _run_workload(
+        seed,
+        simpy.FilterStore,
+        lambda store, machine: store.get()
+        if machine is None
+        else store.get(lambda slot: slot.machine == machine),
+    )
+    actual = _run_workload(
+        seed,
+        MachineSlotStore,
+        lambda store, machine: store.get(machine),
+    )
+    assert len(actual) == 60
+    assert actual == expected
+
+
+def test_counting_slots_acquire_up_to_capacity():
+    slots = CountingSlots(simpy.Environment(), capacity=2)
+    assert slots.try_acquire()
+    assert slots.try_acquire()
+    assert not slots.try_acquire()
+    assert slots.level == 0
+
+    slots.release()
+    assert slots.level == 1
+    assert slots.try_acquire()
+
+
+def test_counting_slots_wake_waiters_in_fifo_order():
+    env = simpy.Environment()
+    slots = CountingSlots(env, capacity=1)
+    assert slots.try_acquire()
+    served = []
+
+    def waiter(name):
+        yield slots.wait()
+        served.append((env.now, name))
+
+    def releaser():
+        for _ in range(3):
+            yield env.timeout(1)
+            slots.release()
+
+    for name in ("a", "b", "c"):
+        env.process(waiter(name))
+    env.process(releaser())
+    env.run()
+
+    assert served == [(1, "a"), (2, "b"), (3, "c")]
+    # Each release handed the slot over directly; the pool stays empty.
+    assert slots.level == 0
+
+
+def test_counting_slots_release_hands_slot_to_waiter():
+    env = simpy.Environment()
+    slots = CountingSlots(env, capacity=1)
+    assert slots.try_acquire()
+    waiting = slots.wait()
+
+    slots.release()
+    assert waiting.triggered
+    assert slots.level == 0
+    assert not slots.try_acquire()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_counting_slots_never_exceed_capacity(seed):
+    env = simpy.Environment()
+    capacity = 3
+    slots = CountingSlots(env, capacity=capacity)
+    rng = random.Random(seed)
+    in_use = [0]
+    peak = [0]
+    done = []
+
+    def user(i, arrive, hold):
+        yield env.timeout(arrive)
+        if not slots.try_acquire():
+            yield slots.wait()
+        in_use[0] += 1
+        peak[0] = max(peak[0], in_use[0])
+        assert in_use[0] + slots.level <= capacity
+        yield env.timeout(hold)
+        in_use[0] -= 1
+        slots.release()
+        done.append(i)
+
+    for i in range(50):
+        env.process(user(i, rng.randint(0, 10), rng.randint(1, 5)))
+    env.run()
+
+    assert len(done) == 50
+    assert peak[0] == capacity
+    assert slots.level == capacity
@@ -1,33 +1,37 @@
 from __future__ import annotations
 
-import json
 import sqlite3
 from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterable, Tuple
 
 DEFAULT_DB = Path("hatchery_events.sqlite")
 
 
 def _connect(db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    # Plain tuple rows: the readers below unpack positionally, which avoids
+    # building a sqlite3.Row per fetched record on large event tables.
+    # The tools only read, so open read-only (no write locks) and let SQLite
+    # map the file and keep more pages cached for the index lookups.
+    conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
     return conn
 
 
 def _load_parent_pairs(conn: sqlite3.Connection) -> Dict[str, str]:
-    parent_pairs: Dict[str, str] = {}
-    for row in conn.execute(
-        """
-        SELECT entity_id, metadata
-        FROM events
-        WHERE stage = 'inventory' AND status = 'arrived'
-        """
-    ):
-        meta = json.loads(row["metadata"]) if row["metadata"] else {}
-        parent_pairs[row["entity_id"]] = meta.get("parent_pair", "unknown")
-    return parent_pairs
+    # Read the one key in SQL rather than decoding each metadata blob in Python.
+    return dict(
+        conn.execute(
+            """
+            SELECT entity_id, COALESCE(json_extract(metadata, '$.parent_pair'), 'unknown')
+            FROM events
+            WHERE stage = 'inventory' AND status = 'arrived'
+            """
+        )
+    )
 
 
 def get_farm_mix(
@@ -49,10 +53,28 @@ def get_farm_mix(
             - "parent_pairs": remaining chicks aggregated by parent pair
     """
 
+    return get_farm_mixes([farm_name], at_date, db_path)[farm_name]
+
+
+def get_farm_mixes(
+    farm_names: Iterable[str],
+    at_date: str,
+    db_path: str | Path = DEFAULT_DB,
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Return `get_farm_mix` for several farms from one connection and query.
+
+    The parent-pair lookup is loaded once and every farm's occupancy comes
+    from a single aggregating query, instead of one of each per farm.
+
+    Returns:
+        A dict keyed by farm name; each value has the `get_farm_mix` shape.
+    """
+
     db_path = Path(db_path)
     if not db_path.exists():
         raise FileNotFoundError(db_path)
 
+    farms = list(dict.fromkeys(farm_names))
     cutoff = datetime.fromisoformat(at_date) + timedelta(days=1)
     cutoff_iso = cutoff.isoformat()
 
@@ -60,42 +82,38 @@ def get_farm_mix(
     try:
         parent_pairs = _load_parent_pairs(conn)
 
-        placements: Dict[str, float] = defaultdict(float)
-        query = (
-            "SELECT entity_id, stage, status, quantity, metadata, real_ts "
-            "FROM events "
-            "WHERE real_ts <= ? AND metadata LIKE ? "
-            "ORDER BY real_ts, id"
-        )
-        pattern = f'%"farm": "{farm_name}"%'
-        for row in conn.execute(query, (cutoff_iso, pattern)):
-            meta = json.loads(row["metadata"]) if row["metadata"] else {}
-            shipment_id = row["entity_id"]
-            qty = float(row["quantity"] or 0)
-            stage = row["stage"]
-            status = row["status"]
-
-            if stage == "farm_intake" and status == "placed":
-                placements[shipment_id] += qty
-            elif stage == "farm_place" and status in {"partial_release", "available"}:
-                removed = float(meta.get("removed_amount", qty))
-                placements[shipment_id] -= removed
-
-        # Filter active shipments (allowing for minor floating point drift)
-        active_shipments = {
-            shipment: max(0.0, qty)
-            for shipment, qty in placements.items()
-            if qty > 1e-6
-        }
-
-        by_source: Dict[str, float] = defaultdict(float)
-        for shipment, qty in active_shipments.items():
-            parent_pair = parent_pairs.get(shipment, "unknown")
-            by_source[parent_pair] += qty
-
-        return {
-            "shipments": dict(active_shipments),
-            "parent_pairs": dict(by_source),
-        }
+        # Net chicks per farm and shipment: intakes minus releases (the
+        # release's `removed_amount`, falling back to its quantity), summed in
+        # SQL. HAVING drops emptied shipments (allowing for minor floating
+        # point drift); shipments keep the order of their first intake/release.
+        placeholders = ", ".join("?" * len(farms))
+        query = f"""
+            SELECT json_extract(metadata, '$.farm') AS farm, entity_id,
+                   SUM(CASE WHEN stage = 'farm_intake' THEN COALESCE(quantity, 0)
+                            ELSE -COALESCE(json_extract(metadata, '$.removed_amount'), quantity, 0)
+                       END) AS net
+            FROM events
+            WHERE json_extract(metadata, '$.farm') IN ({placeholders}) AND real_ts <= ?
+              AND ((stage = 'farm_intake' AND status = 'placed')
+                   OR (stage = 'farm_place' AND status IN ('partial_release', 'available')))
+            GROUP BY farm, entity_id
+            HAVING net > 1e-6
+            ORDER BY MIN(id)
+        """
+        active: Dict[str, Dict[str, float]] = {farm: {} for farm in farms}
+        for farm, shipment, net in conn.execute(query, (*farms, cutoff_iso)):
+            active[farm][shipment] = float(net)
+
+        mixes: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for farm, active_shipments in active.items():
+            by_source: Dict[str, float] = defaultdict(float)
+            for shipment, qty in active_shipments.items():
+                parent_pair = parent_pairs.get(shipment, "unknown")
+                by_source[parent_pair] += qty
+            mixes[farm] = {
+                "shipments": active_shipments,
+                "parent_pairs": dict(by_source),
+            }
+        return mixes
     finally:
         conn.close()